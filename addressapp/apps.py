@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class MyAppConfig(AppConfig):
     name = 'addressapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
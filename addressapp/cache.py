@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from utils.cache import bump_cache_version, get_cache_version
+
+ADDRESS_NAMESPACE = 'addressapp:addresses'
+
+
+def cluster_cache():
+    return caches[settings.ADDRESS_CLUSTER_CACHE_ALIAS]
+
+
+def address_version():
+    return get_cache_version(ADDRESS_NAMESPACE)
+
+
+def bump_address_version():
+    return bump_cache_version(ADDRESS_NAMESPACE)
+
+
+def cluster_tile_key(version, zoom, x, y):
+    return f'{ADDRESS_NAMESPACE}:clusters:{version}:{zoom}:{x}:{y}'
@@ -0,0 +1,114 @@
+import math
+
+from django.conf import settings
+from django.db.models import Avg, Count, FloatField
+from django.db.models.functions import Cast, Floor
+
+from addressapp.cache import address_version, cluster_cache, cluster_tile_key
+from addressapp.models import Address
+
+
+def tile_size(zoom):
+    """(height, width) in degrees of a tile at ``zoom``."""
+    side = 2 ** zoom
+    return 180.0 / side, 360.0 / side
+
+
+def _index(value, origin, size, count):
+    return min(max(int(math.floor((value + origin) / size)), 0), count - 1)
+
+
+def viewport_ranges(min_lat, min_lon, max_lat, max_lon, zoom):
+    """
+    Tile rows and runs of tile columns overlapping a viewport, counted from (-180, -90).
+
+    A viewport with ``min_lon > max_lon`` crosses the antimeridian and has
+    two column runs. Ranges keep this O(1) however many tiles they span.
+    """
+    side = 2 ** zoom
+    height, width = tile_size(zoom)
+    rows = range(_index(min_lat, 90, height, side), _index(max_lat, 90, height, side) + 1)
+    first, last = _index(min_lon, 180, width, side), _index(max_lon, 180, width, side)
+    if min_lon <= max_lon:
+        return rows, [range(first, last + 1)]
+    return rows, [range(first, side), range(last + 1)]
+
+
+def viewport_tile_count(min_lat, min_lon, max_lat, max_lon, zoom):
+    rows, column_runs = viewport_ranges(min_lat, min_lon, max_lat, max_lon, zoom)
+    return len(rows) * sum(len(columns) for columns in column_runs)
+
+
+def viewport_tiles(min_lat, min_lon, max_lat, max_lon, zoom):
+    """Tiles ``(x, y)`` overlapping a viewport; check viewport_tile_count() first."""
+    rows, column_runs = viewport_ranges(min_lat, min_lon, max_lat, max_lon, zoom)
+    return [(x, y) for y in rows for columns in column_runs for x in columns]
+
+
+def tiles_boxes(tiles, zoom):
+    """Boxes covering ``tiles``: their rows by each run of adjacent columns."""
+    height, width = tile_size(zoom)
+    rows = [y for _, y in tiles]
+    min_lat, max_lat = min(rows) * height - 90, (max(rows) + 1) * height - 90
+    boxes = []
+    columns = sorted({x for x, _ in tiles})
+    start = previous = columns[0]
+    for x in columns[1:] + [None]:
+        if x != previous + 1:
+            boxes.append((min_lat, start * width - 180, max_lat, (previous + 1) * width - 180))
+            start = x
+        previous = x
+    return boxes
+
+
+def cluster_tiles(tiles, zoom):
+    """Clusters (centroid and count per grid cell) of every tile in ``tiles``, from one GROUP BY."""
+    grid = settings.ADDRESS_CLUSTER_GRID
+    cells_per_side = 2 ** zoom * grid
+    height, width = tile_size(zoom)
+    cell_height, cell_width = height / grid, width / grid
+
+    cells = (Address.objects.alive().in_boxes(tiles_boxes(tiles, zoom)).order_by()
+             .annotate(row=Floor((Cast('latitude', FloatField()) + 90) / cell_height),
+                       column=Floor((Cast('longitude', FloatField()) + 180) / cell_width))
+             .values('row', 'column')
+             .annotate(count=Count('id'), lat=Avg('latitude'), lon=Avg('longitude')))
+
+    clusters = {tile: [] for tile in tiles}
+    for cell in cells:
+        # Points on lat 90 / lon 180 fall into the last cell rather than one past the edge
+        row = min(int(cell['row']), cells_per_side - 1)
+        column = min(int(cell['column']), cells_per_side - 1)
+        tile = (column // grid, row // grid)
+        # The boxes are inclusive, so a point on their edge can belong to a tile that was not asked for
+        if tile not in clusters:
+            continue
+        if cell['count'] >= settings.ADDRESS_CLUSTER_MIN_COUNT:
+            lat, lon = float(cell['lat']), float(cell['lon'])
+        else:
+            # A mean of a few addresses gives them away
+            lat, lon = (row + 0.5) * cell_height - 90, (column + 0.5) * cell_width - 180
+        clusters[tile].append({'lat': lat, 'lon': lon, 'count': cell['count']})
+    return clusters
+
+
+def viewport_clusters(min_lat, min_lon, max_lat, max_lon, zoom):
+    """
+    Clusters of live addresses in the tiles overlapping a viewport.
+
+    Tiles are cached under the address version, so panning only computes
+    the tiles that scroll into view; any Address write starts a new version.
+    """
+    tiles = viewport_tiles(min_lat, min_lon, max_lat, max_lon, zoom)
+    # Read before the query: a concurrent write bumps it, so stale tiles only land under the old version
+    version = address_version()
+    keys = {cluster_tile_key(version, zoom, x, y): (x, y) for x, y in tiles}
+    clusters = {keys[key]: tile for key, tile in cluster_cache().get_many(list(keys)).items()}
+
+    missing = [tile for tile in tiles if tile not in clusters]
+    if missing:
+        computed = cluster_tiles(missing, zoom)
+        cluster_cache().set_many({cluster_tile_key(version, zoom, x, y): tile for (x, y), tile in computed.items()},
+                                 settings.ADDRESS_CLUSTER_CACHE_TIMEOUT)
+        clusters.update(computed)
+    return [cluster for tile in tiles for cluster in clusters[tile]]
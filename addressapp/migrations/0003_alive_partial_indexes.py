@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addressapp', '0002_address_latitude_address_longitude'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user'], name='address_alive_user_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+from utils import geo
+
+
+def fill_geohash(apps, schema_editor):
+    Address = apps.get_model('addressapp', 'Address')
+    batch = []
+    located = Address.objects.filter(latitude__isnull=False, longitude__isnull=False).only('latitude', 'longitude')
+    for address in located.iterator(chunk_size=1000):
+        address.geohash = geo.encode(float(address.latitude), float(address.longitude))
+        batch.append(address)
+        if len(batch) == 1000:
+            Address.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    Address.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addressapp', '0003_alive_partial_indexes'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['geohash'], name='address_alive_geohash_idx'),
+        ),
+    ]
@@ -1,5 +1,37 @@
 from django.db import models
+from django.db.models import Q
 from userapp.models import UserProfile
+from utils import geo
+from utils.managers import SoftDeleteQuerySet, alive_index
+
+
+class AddressQuerySet(SoftDeleteQuerySet):
+    def in_boxes(self, boxes):
+        """
+        Addresses inside any of ``boxes`` ``(min_lat, min_lon, max_lat, max_lon)``.
+
+        Candidates come from index range scans over the geohash prefixes
+        covering the boxes; the coordinates then drop the ones outside.
+        """
+        in_cells = Q()
+        for prefix in geo.cover(boxes):
+            low, high = geo.prefix_range(prefix)
+            in_cells |= Q(geohash__gte=low, geohash__lt=high) if high else Q(geohash__gte=low)
+        inside = Q()
+        for min_lat, min_lon, max_lat, max_lon in boxes:
+            inside |= Q(latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon))
+        return self.filter(in_cells).filter(inside)
+
+    def within(self, latitude, longitude, radius_km):
+        """Addresses within ``radius_km`` of a point, nearest first, each with ``distance_km`` set."""
+        addresses = []
+        for address in self.in_boxes(geo.bounding_boxes(latitude, longitude, radius_km)):
+            address.distance_km = geo.haversine_km(latitude, longitude, float(address.latitude),
+                                                   float(address.longitude))
+            if address.distance_km <= radius_km:
+                addresses.append(address)
+        addresses.sort(key=lambda address: (address.distance_km, address.id))
+        return addresses
 
 
 class Address(models.Model):
@@ -7,7 +39,30 @@ class Address(models.Model):
     user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # Derived from the coordinates in save(); update() and bulk_create() must set it themselves
+    geohash = models.CharField(max_length=geo.MAX_PRECISION, null=True, blank=True, editable=False)
     is_deleted = models.BooleanField(default=False)
 
+    objects = AddressQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            alive_index('user', name='address_alive_user_idx'),
+            alive_index('geohash', name='address_alive_geohash_idx'),
+        ]
+
     def __str__(self):
         return self.address_name
+
+    def save(self, *args, **kwargs):
+        self.geohash = coordinates_geohash(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
+
+def coordinates_geohash(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    return geo.encode(float(latitude), float(longitude))
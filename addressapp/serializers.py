@@ -1,4 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
+from .clusters import viewport_tile_count
 from .models import Address
 from userapp.models import UserProfile
 
@@ -9,4 +11,21 @@ class AddressSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Address
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class ClusterQuerySerializer(serializers.Serializer):
+    min_lat = serializers.FloatField(min_value=-90, max_value=90)
+    min_lon = serializers.FloatField(min_value=-180, max_value=180,
+                                     help_text="Greater than max_lon when the viewport crosses the antimeridian")
+    max_lat = serializers.FloatField(min_value=-90, max_value=90)
+    max_lon = serializers.FloatField(min_value=-180, max_value=180)
+    zoom = serializers.IntegerField(min_value=0, max_value=settings.ADDRESS_CLUSTER_MAX_ZOOM)
+
+    def validate(self, data):
+        if data['min_lat'] > data['max_lat']:
+            raise serializers.ValidationError("min_lat must not be greater than max_lat.")
+        tiles = viewport_tile_count(data['min_lat'], data['min_lon'], data['max_lat'], data['max_lon'], data['zoom'])
+        if tiles > settings.ADDRESS_CLUSTER_MAX_TILES:
+            raise serializers.ValidationError("The viewport covers too many tiles at this zoom; zoom out.")
+        return data
@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from addressapp.cache import bump_address_version
+from addressapp.models import Address
+
+
+# QuerySet.update() and bulk_create() send no signals; bump the version after using them
+@receiver([post_save, post_delete], sender=Address)
+def invalidate_cluster_tiles(sender, **kwargs):
+    transaction.on_commit(bump_address_version)
@@ -1,3 +1,111 @@
-from django.test import TestCase
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Tests
+from addressapp.cache import address_version
+from addressapp.models import Address
+from userapp.models import UserProfile
+from utils import geo
+from utils.testing import ExplainTestMixin
+
+
+class AliveIndexTest(ExplainTestMixin, TestCase):
+    def test_user_addresses_use_partial_index(self):
+        self.assertUsesIndex(Address.objects.alive().filter(user_id=1), 'address_alive_user_idx')
+
+    def test_geohash_prefixes_use_partial_index(self):
+        self.assertUsesIndex(Address.objects.alive().filter(geohash__gte='tx34', geohash__lt='tx35'),
+                             'address_alive_geohash_idx')
+
+
+class AddressGeohashTest(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(username='seller', password='secret', age=30)
+
+    def test_geohash_follows_coordinates(self):
+        address = Address.objects.create(address_name='Home', user=self.user, latitude='41.311081',
+                                         longitude='69.240562')
+        self.assertEqual(address.geohash, geo.encode(41.311081, 69.240562))
+
+        address.latitude = '40.783388'
+        address.save(update_fields=['latitude'])
+        self.assertEqual(Address.objects.get(id=address.id).geohash, geo.encode(40.783388, 69.240562))
+
+        address.longitude = None
+        address.save()
+        self.assertIsNone(Address.objects.get(id=address.id).geohash)
+
+    def test_within_radius(self):
+        # Tashkent centre, a point ~8 km away, Samarkand ~270 km away, and one across the box corner
+        for name, lat, lon in [('centre', '41.311081', '69.240562'), ('near', '41.350000', '69.320000'),
+                               ('far', '39.654167', '66.959722'), ('corner', '41.390000', '69.360000')]:
+            Address.objects.create(address_name=name, user=self.user, latitude=lat, longitude=lon)
+        Address.objects.create(address_name='deleted', user=self.user, latitude='41.311081', longitude='69.240562',
+                               is_deleted=True)
+
+        found = Address.objects.alive().within(41.311081, 69.240562, 10)
+        self.assertEqual([address.address_name for address in found], ['centre', 'near'])
+        self.assertAlmostEqual(found[1].distance_km, 7.9, places=1)
+
+    def test_tiny_radius_finds_the_exact_point(self):
+        Address.objects.create(address_name='centre', user=self.user, latitude='41.311081', longitude='69.240562')
+        for radius_km in (0, 0.001):
+            found = Address.objects.alive().within(41.311081, 69.240562, radius_km)
+            self.assertEqual([address.address_name for address in found], ['centre'])
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'versions': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache_versions'},
+    'catalogue': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'address-clusters'},
+}, ADDRESS_CLUSTER_GRID=4, ADDRESS_CLUSTER_MIN_COUNT=3)
+class AddressClusterTest(TestCase):
+    def setUp(self):
+        caches['catalogue'].clear()
+        address_version()
+        self.client = APIClient()
+        self.user = UserProfile.objects.create_user(username='seller', password='secret', age=30)
+        # Three points in Tashkent and one in Samarkand, ~270 km apart
+        for lat, lon in [('41.30', '69.20'), ('41.32', '69.28'), ('41.34', '69.30'), ('39.65', '66.96')]:
+            Address.objects.create(address_name='shop', user=self.user, latitude=lat, longitude=lon)
+        Address.objects.create(address_name='closed', user=self.user, latitude='41.3', longitude='69.2',
+                               is_deleted=True)
+        self.viewport = {'min_lat': 38, 'min_lon': 64, 'max_lat': 43, 'max_lon': 71, 'zoom': 5}
+
+    def test_clusters_are_grouped_per_cell_and_cached(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/address/clusters/', self.viewport)
+        clusters = sorted(response.data['clusters'], key=lambda cluster: cluster['count'])
+        self.assertEqual([cluster['count'] for cluster in clusters], [1, 3])
+        self.assertAlmostEqual(clusters[1]['lat'], 41.32)
+        self.assertAlmostEqual(clusters[1]['lon'], 69.26)
+        # Samarkand alone: the centre of its 1.40625 x 2.8125 degree cell, not the shop itself
+        self.assertAlmostEqual(clusters[0]['lat'], 40.078125)
+        self.assertAlmostEqual(clusters[0]['lon'], 66.09375)
+
+        # Only the shared version stamp is read from the database
+        with self.assertNumQueries(1):
+            cached = self.client.get('/address/clusters/', self.viewport)
+        self.assertEqual(cached.data, response.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Address.objects.create(address_name='new', user=self.user, latitude='39.66', longitude='66.97')
+        response = self.client.get('/address/clusters/', self.viewport)
+        self.assertEqual(sorted(cluster['count'] for cluster in response.data['clusters']), [2, 3])
+
+    def test_panning_computes_only_new_tiles(self):
+        self.client.get('/address/clusters/', self.viewport)
+        panned = dict(self.viewport, min_lon=68, max_lon=80)
+        with self.assertNumQueries(2):
+            response = self.client.get('/address/clusters/', panned)
+        self.assertEqual([cluster['count'] for cluster in response.data['clusters']], [3])
+
+    def test_viewport_is_bounded(self):
+        response = self.client.get('/address/clusters/', dict(self.viewport, zoom=13))
+        self.assertEqual(response.status_code, 400)
+
+        # Rejected from the tile count alone, without listing ~10^7 tiles
+        world = {'min_lat': -90, 'min_lon': 170, 'max_lat': 90, 'max_lon': 160, 'zoom': 12}
+        with self.assertNumQueries(0):
+            response = self.client.get('/address/clusters/', world)
+        self.assertEqual(response.status_code, 400)
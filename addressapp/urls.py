@@ -4,5 +4,6 @@ from . import views
 
 urlpatterns = [
     path('', views.AddressList.as_view(), name='address'),
+    path('clusters/', views.AddressClusters.as_view(), name='address_clusters'),
     path('<int:_id>/', views.AddressDetails.as_view(), name='address_details'),
 ]
@@ -3,19 +3,19 @@ from rest_framework import permissions
 from drf_yasg import openapi
 import logging
 from .serializers import *
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
-from utils.tokens import get_user_id_from_token
+from utils.auth import IdentityJWTAuthentication, get_identity
+from .clusters import viewport_clusters
 
 
 logger = logging.getLogger('addressapp.views')
 
 
 class AddressList(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [IdentityJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -26,10 +26,9 @@ class AddressList(APIView):
         security=[],
     )
     def get(self, request):
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id)
+        user_profile = get_identity(request).get_snapshot()
         try:
-            address = Address.objects.filter(user=user_profile, is_deleted=False)
+            address = Address.objects.alive().filter(user_id=user_profile.id)
             serializer = AddressSerializer(address, many=True)
         except Address.DoesNotExist:
             logger.error(f"Address not found.")
@@ -53,10 +52,9 @@ class AddressList(APIView):
     def post(self, request):
         serializer = AddressSerializer(data=request.data)
         if serializer.is_valid():
-            user_id = get_user_id_from_token(request)
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_identity(request).get_profile()
             serializer.save(user=user_profile)
-            logger.info(f"New address created with ID {serializer.data.get('id')} for user {user_id}.")
+            logger.info(f"New address created with ID {serializer.data.get('id')} for user {user_profile.id}.")
             return Response(serializer.data, status=200)
         else:
             logger.error(f"Failed to create a new address: {serializer.errors}")
@@ -64,13 +62,12 @@ class AddressList(APIView):
 
 
 class AddressDetails(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [IdentityJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self, request, _id):
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id)
-        return get_object_or_404(Address, user=user_profile, id=_id, is_deleted=False)
+        user_profile = get_identity(request).get_snapshot()
+        return get_object_or_404(Address.objects.alive(), user_id=user_profile.id, id=_id)
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -135,3 +132,18 @@ class AddressDetails(APIView):
         address.save()
         logger.info(f"Address with ID {_id} marked as deleted.")
         return Response({"message": "Address has been successfully removed"}, status=200)
+
+
+class AddressClusters(APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(query_serializer=ClusterQuerySerializer())
+    def get(self, request):
+        query_serializer = ClusterQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+
+        clusters = viewport_clusters(params['min_lat'], params['min_lon'], params['max_lat'], params['max_lon'],
+                                     params['zoom'])
+        return Response({"zoom": params['zoom'], "clusters": clusters}, status=200)
@@ -0,0 +1,15 @@
+"""
+Gunicorn profile for serving the project over ASGI with uvicorn workers.
+
+    gunicorn car_backend_Aether.asgi:application -c car_backend_Aether/gunicorn_asgi.py
+
+The catalogue reads (/cars/, /cars/<id>/, /models/) switch to their async
+views under this profile; everything else keeps running the sync DRF views
+in the worker's thread pool.
+"""
+import os
+
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+raw_env = ['CATALOGUE_ASYNC_VIEWS=True']
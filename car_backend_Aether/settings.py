@@ -91,14 +91,68 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'utils.auth.IdentityJWTAuthentication',
     )
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Version stamps of the cached catalogues: every worker and management command must read the
+    # same ones, so they live in the database (`manage.py createcachetable`) unless e.g. Redis is set.
+    'versions': {
+        'BACKEND': os.getenv('VERSIONS_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('VERSIONS_CACHE_LOCATION', 'cache_versions'),
+    },
+    # Entries are keyed by a version stamp, so a process-local copy is never served after a bump.
+    'catalogue': {
+        'BACKEND': os.getenv('CATALOGUE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CATALOGUE_CACHE_LOCATION', 'catalogue'),
+    },
+}
+CACHE_VERSION_ALIAS = 'versions'
+
+CAR_LIST_PAGE_SIZE = int(os.getenv('CAR_LIST_PAGE_SIZE', 30))
+CAR_LIST_MAX_PAGE_SIZE = int(os.getenv('CAR_LIST_MAX_PAGE_SIZE', 100))
+CAR_NEARBY_MAX_RADIUS_KM = float(os.getenv('CAR_NEARBY_MAX_RADIUS_KM', 200))
+# Map clusters: each zoom level splits the world into 2**zoom x 2**zoom tiles of GRID x GRID cells
+ADDRESS_CLUSTER_CACHE_ALIAS = 'catalogue'
+ADDRESS_CLUSTER_CACHE_TIMEOUT = int(os.getenv('ADDRESS_CLUSTER_CACHE_TIMEOUT', 3600))
+ADDRESS_CLUSTER_GRID = int(os.getenv('ADDRESS_CLUSTER_GRID', 8))
+# The endpoint is public: cells stay around a kilometre wide, and clusters smaller than MIN_COUNT
+# report their cell centre instead of the mean of their addresses.
+ADDRESS_CLUSTER_MAX_ZOOM = 12
+ADDRESS_CLUSTER_MIN_COUNT = int(os.getenv('ADDRESS_CLUSTER_MIN_COUNT', 5))
+ADDRESS_CLUSTER_MAX_TILES = int(os.getenv('ADDRESS_CLUSTER_MAX_TILES', 64))
+# Buffered view counts are not a catalogue write, so the timeout bounds how stale `views` can be.
+CAR_LIST_CACHE_ALIAS = 'catalogue'
+CAR_LIST_CACHE_TIMEOUT = int(os.getenv('CAR_LIST_CACHE_TIMEOUT', 60))
+# Serve catalogue reads from async views; set by the ASGI deployment (car_backend_Aether/gunicorn_asgi.py)
+CATALOGUE_ASYNC_VIEWS = os.getenv('CATALOGUE_ASYNC_VIEWS', 'False') == 'True'
+CAR_BULK_MAX_ITEMS = int(os.getenv('CAR_BULK_MAX_ITEMS', 500))
+CAR_IMAGE_VARIANT_SIZES = (160, 480, 1024)
+CAR_IMAGE_WORKERS = int(os.getenv('CAR_IMAGE_WORKERS', 2))
+# Unreferenced blobs stored more recently than this are left for gc_image_blobs
+CAR_IMAGE_BLOB_GRACE_SECONDS = int(os.getenv('CAR_IMAGE_BLOB_GRACE_SECONDS', 3600))
+CAR_AUTOCOMPLETE_LIMIT = 10
+CAR_AUTOCOMPLETE_MAX_LIMIT = 50
+CAR_VIEWS_FLUSH_INTERVAL = float(os.getenv('CAR_VIEWS_FLUSH_INTERVAL', 10))
+CAR_VIEWS_FLUSH_SIZE = int(os.getenv('CAR_VIEWS_FLUSH_SIZE', 100))
+CAR_TRENDING_HALF_LIFE_HOURS = float(os.getenv('CAR_TRENDING_HALF_LIFE_HOURS', 24))
+# Per-process cache of profile snapshots used for authentication and permission checks
+USER_PROFILE_CACHE_SIZE = int(os.getenv('USER_PROFILE_CACHE_SIZE', 10000))
+USER_PROFILE_CACHE_TTL = float(os.getenv('USER_PROFILE_CACHE_TTL', 60))
+# Edges of the price buckets reported in catalogue facets
+CAR_PRICE_FACET_BUCKETS = (5000, 10000, 20000, 50000, 100000)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=45),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
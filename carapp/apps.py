@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ProductApp(AppConfig):
     name = 'carapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
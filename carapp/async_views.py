@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db.models import aprefetch_related_objects
+from rest_framework.exceptions import ValidationError
+
+from carapp.cache import acatalogue_version, car_list_cache_key, catalogue_cache
+from carapp.counters import view_counter
+from carapp.facets import acar_facets
+from carapp.models import Car
+from carapp.serializers import CarQuerySerializer, CarSerializer
+from carapp.views import CarDetail, CarList, CarListMixin, page_state
+from modelapp.models import Model
+from utils.async_views import AsyncReadView
+from utils.auth import get_identity
+from utils.http import make_etag, not_modified_response, set_validators
+
+
+class AsyncCarList(CarListMixin, AsyncReadView):
+    sync_view = CarList
+
+    async def get(self, request):
+        query_serializer = CarQuerySerializer(data=request.GET)
+        if not query_serializer.is_valid():
+            return self.json(query_serializer.errors, status=400)
+        params = query_serializer.validated_data
+        paginator = self.get_paginator(params)
+
+        version = await acatalogue_version()
+        cache_key = car_list_cache_key(version, params)
+        cached = await catalogue_cache().aget(cache_key)
+        if cached is None:
+            if params.get('model') and not await Model.objects.filter(id=params['model']).aexists():
+                return self.json({"message": "Model not found"}, status=404)
+            cars = self.get_queryset(params)
+
+            facets = None
+            if params['include_facets']:
+                facets = await acar_facets(self.get_facet_queryset(params), model=params.get('model'),
+                                           min_price=params.get('min_price'), max_price=params.get('max_price'))
+            try:
+                page = await paginator.apaginate_queryset(cars.prefetch_related(None), cursor=params.get('cursor'))
+            except ValidationError as e:
+                return self.json(e.detail, status=400)
+            rows, last_modified = page_state(page)
+            etag = self.get_etag(version, params, rows, facets)
+            not_modified = not_modified_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+
+            await aprefetch_related_objects(page, 'images')
+            serializer = CarSerializer(page, many=True, context={'image_size': params.get('image_size')})
+            cached = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'next_cursor': paginator.next_cursor,
+                'results': serializer.data,
+                'facets': facets,
+            }
+            await catalogue_cache().aset(cache_key, cached, settings.CAR_LIST_CACHE_TIMEOUT)
+        else:
+            not_modified = not_modified_response(request, cached['etag'], cached['last_modified'])
+            if not_modified is not None:
+                return not_modified
+
+        response = self.json(self.get_paginated_data(request, paginator, cached))
+        return set_validators(response, cached['etag'], cached['last_modified'])
+
+
+class AsyncCarDetail(AsyncReadView):
+    sync_view = CarDetail
+
+    async def get(self, request, _id):
+        user = await get_identity(request).asnapshot()
+        lookup = {'id': _id} if user is None else {'id': _id, 'user_id': user.id}
+
+        if 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers:
+            state = await Car.objects.filter(**lookup).values('updated_at', 'views', 'favourites_count').afirst()
+            if state is not None:
+                etag = make_etag('car', _id, state['updated_at'].isoformat(), state['views'],
+                                 state['favourites_count'])
+                not_modified = not_modified_response(request, etag, state['updated_at'])
+                if not_modified is not None:
+                    await view_counter.aincr(_id)
+                    return not_modified
+
+        car = await Car.objects.prefetch_related('images').filter(**lookup).afirst()
+        if car is None:
+            return self.json({"message": "Car Not Found"}, status=404)
+
+        etag = make_etag('car', car.id, car.updated_at.isoformat(), car.views, car.favourites_count)
+        await view_counter.aincr(car.id)
+        car.views += 1
+        return set_validators(self.json(CarSerializer(car).data), etag, car.updated_at)
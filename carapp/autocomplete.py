@@ -0,0 +1,128 @@
+import re
+import threading
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+
+from carapp.models import Car
+from modelapp.cache import model_catalogue_version
+from modelapp.models import Model
+
+WORD_START = re.compile(r'\w+')
+
+
+def suggest(query, limit):
+    """Return up to ``limit`` title suggestions for ``query``, best match first."""
+    if connection.vendor == 'postgresql':
+        return trigram_suggest(query, limit)
+    return get_trie().suggest(query, limit)
+
+
+def trigram_suggest(query, limit):
+    # ``<%`` (word similarity) is answered from the gin_trgm_ops indexes on both columns
+    cars = (Car.objects.alive().filter(title__trigram_word_similar=query)
+            .annotate(score=TrigramWordSimilarity(query, 'title'))
+            .values_list('title', 'score').distinct().order_by('-score')[:limit])
+    models = (Model.objects.filter(model_name__trigram_word_similar=query)
+              .annotate(score=TrigramWordSimilarity(query, 'model_name'))
+              .values_list('model_name', 'score').distinct().order_by('-score')[:limit])
+
+    suggestions = [{'text': text, 'kind': 'car', 'score': score} for text, score in cars]
+    suggestions += [{'text': text, 'kind': 'model', 'score': score} for text, score in models]
+    suggestions.sort(key=lambda item: item['score'], reverse=True)
+    return suggestions[:limit]
+
+
+class TrieNode:
+    __slots__ = ('children', 'entries')
+
+    def __init__(self):
+        self.children = {}
+        self.entries = set()
+
+
+class PrefixTrie:
+    """
+    In-process prefix trie used for autocomplete when the database has no pg_trgm.
+
+    Every word start of a title is indexed, so "cam" finds "Toyota Camry".
+    Lookups tolerate a small number of typos in the typed prefix by walking
+    the trie with a Levenshtein row per node.
+    """
+
+    def __init__(self):
+        self.root = TrieNode()
+
+    def insert(self, text, kind):
+        lowered = text.lower()
+        for match in WORD_START.finditer(lowered):
+            node = self.root
+            for char in lowered[match.start():]:
+                node = node.children.setdefault(char, TrieNode())
+            node.entries.add((text, kind))
+
+    def suggest(self, query, limit):
+        query = query.lower().strip()
+        if not query:
+            return []
+        max_edits = 0 if len(query) < 3 else 1 if len(query) < 6 else 2
+
+        matches = {}
+        first_row = list(range(len(query) + 1))
+        for char, child in self.root.children.items():
+            self._search(child, char, query, first_row, max_edits, matches)
+
+        suggestions = [
+            {'text': text, 'kind': kind, 'score': 1 - distance / (len(query) + 1)}
+            for (text, kind), distance in matches.items()
+        ]
+        suggestions.sort(key=lambda item: (-item['score'], len(item['text']), item['text']))
+        return suggestions[:limit]
+
+    def _search(self, node, char, query, previous_row, max_edits, matches):
+        row = [previous_row[0] + 1]
+        for column in range(1, len(query) + 1):
+            cost = 0 if query[column - 1] == char else 1
+            row.append(min(row[column - 1] + 1, previous_row[column] + 1, previous_row[column - 1] + cost))
+
+        if row[-1] <= max_edits:
+            # The whole query matched a prefix: everything below this node completes it
+            self._collect(node, row[-1], matches)
+        if min(row) < min(row[-1], max_edits + 1):
+            # A longer prefix may still match with fewer edits
+            for next_char, child in node.children.items():
+                self._search(child, next_char, query, row, max_edits, matches)
+
+    def _collect(self, node, distance, matches):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for entry in current.entries:
+                if distance < matches.get(entry, distance + 1):
+                    matches[entry] = distance
+            stack.extend(current.children.values())
+
+
+# (catalogue version, trie) of this process
+_trie = None
+_trie_lock = threading.Lock()
+
+
+def get_trie():
+    """
+    Trie of the current catalogue.
+
+    It is keyed by the shared catalogue version, so a car or model write in
+    any process, command included, makes every process rebuild it once.
+    """
+    global _trie
+    version = model_catalogue_version(with_counts=True)
+    with _trie_lock:
+        if _trie is None or _trie[0] != version:
+            trie = PrefixTrie()
+            for title in Car.objects.alive().values_list('title', flat=True).iterator():
+                trie.insert(title, 'car')
+            for model_name in Model.objects.values_list('model_name', flat=True).iterator():
+                trie.insert(model_name, 'model')
+            _trie = (version, trie)
+        return _trie[1]
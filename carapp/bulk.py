@@ -0,0 +1,114 @@
+from django.db import transaction
+
+from carapp.cache import bump_catalogue_version
+from carapp.models import Car, CarImage, ImageBlob
+from carapp.serializers import CarBulkItemSerializer
+from carapp.signals import batched_image_changes
+from carapp.storage import image_storage
+from carapp.variants import schedule_variants
+from modelapp.models import Model
+
+
+def validate_cars(items):
+    """
+    Validate a batch of car payloads together.
+
+    Field validation runs per item; model existence and the unique
+    description are checked for the whole batch with one query each.
+    Returns ``(validated, errors)`` where ``errors`` is aligned with ``items``
+    and holds an empty dict for every valid item.
+    """
+    errors = [{} for _ in items]
+    validated = {}
+    for index, item in enumerate(items):
+        serializer = CarBulkItemSerializer(data=item)
+        if serializer.is_valid():
+            validated[index] = serializer.validated_data
+        else:
+            errors[index] = serializer.errors
+
+    model_ids = {data['model'] for data in validated.values()}
+    existing_models = set(Model.objects.filter(id__in=model_ids).values_list('id', flat=True))
+    descriptions = [data['description'] for data in validated.values()]
+    taken = set(Car.objects.filter(description__in=descriptions).values_list('description', flat=True))
+
+    seen = set()
+    for index, data in validated.items():
+        if data['model'] not in existing_models:
+            errors[index]['model'] = [f"Model with ID {data['model']} does not exist."]
+        if data['description'] in taken or data['description'] in seen:
+            errors[index]['description'] = ["car with this description already exists."]
+        seen.add(data['description'])
+
+    return [data for index, data in validated.items() if not errors[index]], errors
+
+
+def create_cars(user, validated, batch_size=500):
+    """Insert validated cars and their images with two bulk INSERTs in one transaction."""
+    with transaction.atomic():
+        cars = Car.objects.bulk_create([
+            Car(user_id=user.id, model_id=data['model'], title=data['title'], description=data['description'],
+                price=data['price'], amount=data['amount'])
+            for data in validated
+        ], batch_size=batch_size)
+        images = CarImage.objects.bulk_create([
+            CarImage(car=car, image=image, position=position)
+            for car, data in zip(cars, validated)
+            for position, image in enumerate(data['cover_img'])
+        ], batch_size=batch_size)
+
+        # bulk_create does not send post_save
+        transaction.on_commit(bump_catalogue_version)
+        ImageBlob.objects.retain([image.image.name for image in images])
+        transaction.on_commit(lambda: schedule_variants([(image.id, image.image.name) for image in images]))
+    return cars
+
+
+def sync_car_images(car, uploads, keep=None):
+    """
+    Bring the images of ``car`` in line with a submitted set.
+
+    With ``keep`` (ordered ids of existing images) the kept images come first
+    and ``uploads`` are appended. Without it ``uploads`` is the complete new
+    set; entries naming an existing image (by stored name, or by content for
+    files) keep that row. Only new images are inserted, removed ones are
+    deleted, and moved ones get their position rewritten; blob references,
+    the car touch and the cache bump are applied once for all of them.
+    Returns True when anything changed.
+    """
+    existing = {image.id: image for image in car.images.all()}
+    if keep is not None:
+        entries = [existing[image_id] for image_id in keep] + list(uploads)
+    else:
+        by_name = {image.image.name: image for image in existing.values()}
+        entries = []
+        for upload in uploads:
+            name = upload if isinstance(upload, str) else image_storage.content_name(upload)
+            entries.append(by_name.pop(name, upload))
+
+    kept, moved, new = set(), [], []
+    for position, entry in enumerate(entries):
+        if isinstance(entry, CarImage):
+            kept.add(entry.id)
+            if entry.position != position:
+                entry.position = position
+                moved.append(entry)
+        else:
+            new.append(CarImage(car=car, image=entry, position=position))
+    removed = existing.keys() - kept
+
+    if not (removed or moved or new):
+        return False
+    with transaction.atomic(), batched_image_changes() as changes:
+        if removed:
+            # The post_delete handlers record into the batch, so their work is done once on exit
+            CarImage.objects.filter(id__in=removed).delete()
+        if moved:
+            CarImage.objects.bulk_update(moved, ['position'])
+        if new:
+            created = CarImage.objects.bulk_create(new)
+            # bulk_create does not send post_save
+            changes.retained.extend(image.image.name for image in created)
+            changes.created.extend((image.id, image.image.name) for image in created)
+        changes.car_ids.add(car.id)
+    return True
@@ -0,0 +1,36 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+from utils.cache import aget_cache_version, bump_cache_version, get_cache_version
+
+CATALOGUE_NAMESPACE = 'carapp:catalogue'
+
+
+def catalogue_cache():
+    return caches[settings.CAR_LIST_CACHE_ALIAS]
+
+
+def catalogue_version():
+    return get_cache_version(CATALOGUE_NAMESPACE)
+
+
+async def acatalogue_version():
+    return await aget_cache_version(CATALOGUE_NAMESPACE)
+
+
+def bump_catalogue_version():
+    return bump_cache_version(CATALOGUE_NAMESPACE)
+
+
+def params_digest(params):
+    normalized = json.dumps({k: v for k, v in params.items() if v is not None}, sort_keys=True, default=str)
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def car_list_cache_key(version, params):
+    # Read the version before the query runs: a concurrent write bumps it,
+    # so a result computed from pre-write data is only ever stored under the old version.
+    return f'{CATALOGUE_NAMESPACE}:list:{version}:{params_digest(params)}'
@@ -0,0 +1,94 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+
+from carapp.models import Car
+
+logger = logging.getLogger('carapp.counters')
+
+
+class ViewCounter:
+    """
+    Write-behind buffer for ``Car.views``.
+
+    Views are counted in process memory and written back in batches: one
+    ``UPDATE ... SET views = views + n WHERE id IN (...)`` per distinct n.
+    A flush happens once CAR_VIEWS_FLUSH_SIZE views are buffered, at the
+    latest CAR_VIEWS_FLUSH_INTERVAL seconds after a view was buffered (from
+    a timer thread, so a process that goes quiet still writes its views),
+    and at interpreter exit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._buffered = 0
+        self._timer = None
+
+    def _add(self, car_id, amount):
+        with self._lock:
+            self._pending[car_id] += amount
+            self._buffered += amount
+            self._arm_timer()
+            return self._buffered >= settings.CAR_VIEWS_FLUSH_SIZE
+
+    def _arm_timer(self):
+        # Called with the lock held
+        if self._timer is None:
+            self._timer = threading.Timer(settings.CAR_VIEWS_FLUSH_INTERVAL, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own connection
+            connections.close_all()
+
+    def incr(self, car_id, amount=1):
+        if self._add(car_id, amount):
+            self.flush()
+
+    async def aincr(self, car_id, amount=1):
+        if self._add(car_id, amount):
+            await sync_to_async(self.flush)()
+
+    def pending(self, car_id):
+        with self._lock:
+            return self._pending[car_id]
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._buffered = 0
+        if not pending:
+            return
+
+        by_amount = defaultdict(list)
+        for car_id, amount in pending.items():
+            by_amount[amount].append(car_id)
+        try:
+            # All batches or none, so a failure can put every view back without counting any twice
+            with transaction.atomic():
+                for amount, car_ids in by_amount.items():
+                    Car.objects.filter(id__in=car_ids).update(views=F('views') + amount)
+        except Exception as e:
+            logger.error(f"Failed to flush {sum(pending.values())} buffered car views: {str(e)}")
+            with self._lock:
+                self._pending.update(pending)
+                self._buffered += sum(pending.values())
+                self._arm_timer()
+
+
+view_counter = ViewCounter()
+atexit.register(view_counter.flush)
@@ -0,0 +1,74 @@
+import csv
+import json
+import zlib
+
+from carapp.models import Car
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_FIELDS = ['id', 'model', 'title', 'description', 'price', 'amount', 'views', 'created_at', 'updated_at',
+                 'images']
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_queryset():
+    return (Car.objects.alive()
+            .select_related('model').prefetch_related('images')
+            .defer('search_vector').order_by('id'))
+
+
+def car_rows(chunk_size):
+    # iterator() streams from a server-side cursor on PostgreSQL; with a chunk_size
+    # the images are still prefetched, one query per chunk.
+    for car in export_queryset().iterator(chunk_size=chunk_size):
+        yield {
+            'id': car.id,
+            'model': car.model.model_name,
+            'title': car.title,
+            'description': car.description,
+            'price': car.price,
+            'amount': car.amount,
+            'views': car.views,
+            'created_at': car.created_at.isoformat(),
+            'updated_at': car.updated_at.isoformat(),
+            # import_cars maps these back to storage names
+            'images': [image.image.url for image in car.images.all()],
+        }
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row['images'] = '|'.join(row['images'])
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def gzip_chunks(lines):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for line in lines:
+        data = compressor.compress(line.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_cars(export_format='ndjson', compress=False, chunk_size=2000):
+    """Yield the catalogue export as encoded chunks, never holding more than one chunk of cars."""
+    rows = car_rows(chunk_size)
+    lines = csv_lines(rows) if export_format == 'csv' else ndjson_lines(rows)
+    if compress:
+        return gzip_chunks(lines)
+    return (line.encode() for line in lines)
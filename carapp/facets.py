@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db.models import Count, Q
+
+
+def price_buckets(edges):
+    bounds = [None, *edges, None]
+    return list(zip(bounds, bounds[1:]))
+
+
+def price_filter(low=None, high=None, inclusive=False):
+    condition = Q()
+    if low is not None:
+        condition &= Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lte=high) if inclusive else Q(price__lt=high)
+    return condition
+
+
+def car_facets(cars, model=None, min_price=None, max_price=None, edges=None):
+    """
+    Count ``cars`` per model and per price bucket in one grouped query.
+
+    ``cars`` must carry every filter except the faceted ones. Each facet
+    honours the other facet's filter but not its own, so the model list
+    still offers alternatives to the selected model and the price buckets
+    cover the full range.
+    """
+    buckets = price_buckets(settings.CAR_PRICE_FACET_BUCKETS if edges is None else edges)
+    rows = list(facet_queryset(cars, buckets, min_price, max_price))
+    return summarize_facets(rows, buckets, model)
+
+
+async def acar_facets(cars, model=None, min_price=None, max_price=None, edges=None):
+    buckets = price_buckets(settings.CAR_PRICE_FACET_BUCKETS if edges is None else edges)
+    rows = [row async for row in facet_queryset(cars, buckets, min_price, max_price)]
+    return summarize_facets(rows, buckets, model)
+
+
+def facet_queryset(cars, buckets, min_price=None, max_price=None):
+    in_price = price_filter(min_price, max_price, inclusive=True)
+    aggregates = {
+        'in_price': Count('id', filter=in_price or None),
+    }
+    for index, (low, high) in enumerate(buckets):
+        aggregates[f'bucket_{index}'] = Count('id', filter=price_filter(low, high) or None)
+    return cars.order_by().values('model', 'model__model_name').annotate(**aggregates)
+
+
+def summarize_facets(rows, buckets, model=None):
+    selected = [row for row in rows if model is None or str(row['model']) == str(model)]
+    facets = {
+        'model': sorted(
+            ({'id': row['model'], 'name': row['model__model_name'], 'count': row['in_price']} for row in rows),
+            key=lambda item: (-item['count'], item['name']),
+        ),
+        'price': [
+            {'min': low, 'max': high, 'count': sum(row[f'bucket_{index}'] for row in selected)}
+            for index, (low, high) in enumerate(buckets)
+        ],
+    }
+    return facets
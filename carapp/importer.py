@@ -0,0 +1,177 @@
+import csv
+import gzip
+import io
+import json
+from urllib.parse import unquote
+
+from django.db import connection, transaction
+
+from carapp.models import Car, CarImage, ImageBlob
+from carapp.storage import image_storage
+from carapp.variants import schedule_variants
+from modelapp.models import Model
+
+CONFLICT_POLICIES = ('skip', 'update', 'error')
+UPDATE_FIELDS = ['title', 'price', 'amount', 'model_id', 'updated_at']
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def open_source(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def read_records(path):
+    """
+    Stream records from a CSV or NDJSON file (optionally .gz), in the layout written by export_cars.
+
+    A line that is not a JSON object is yielded as an ``ImportRowError`` in
+    its place, so it is rejected like any other bad row and row offsets used
+    by checkpoints stay the same.
+    """
+    name = path[:-3] if path.endswith('.gz') else path
+    with open_source(path) as source:
+        if name.endswith('.csv'):
+            for row in csv.DictReader(source):
+                row['images'] = [image for image in (row.get('images') or '').split('|') if image]
+                yield row
+        else:
+            for number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield ImportRowError(f"Line {number}: invalid JSON ({e})")
+                    continue
+                if not isinstance(record, dict):
+                    yield ImportRowError(f"Line {number}: expected an object, got {type(record).__name__}")
+                    continue
+                yield record
+
+
+def image_name(value):
+    """Storage name of an exported image URL; anything else is taken as a name already."""
+    value = str(value)
+    if value.startswith(image_storage.base_url):
+        return unquote(value[len(image_storage.base_url):])
+    return value
+
+
+class CarImporter:
+    """
+    Load car records in batches.
+
+    ``model`` names are resolved through a map loaded once up front. On
+    PostgreSQL a batch is COPYed into a temporary table and moved into
+    carapp_car with a single INSERT ... ON CONFLICT (description); other
+    backends use bulk_create. Duplicate descriptions are resolved according
+    to ``on_conflict``: skip the incoming row, update the existing car, or
+    fail the batch.
+    """
+
+    def __init__(self, on_conflict='skip', user_id=None):
+        self.on_conflict = on_conflict
+        self.user_id = user_id
+        self.model_ids = dict((name, pk) for pk, name in Model.objects.values_list('id', 'model_name'))
+        self.use_copy = connection.vendor == 'postgresql'
+
+    def clean(self, record):
+        if isinstance(record, ImportRowError):
+            raise record
+        try:
+            model_id = self.model_ids[record['model']]
+        except KeyError:
+            raise ImportRowError(f"Unknown model {record.get('model')!r}")
+        try:
+            return {
+                'model_id': model_id,
+                'title': str(record['title'])[:100],
+                'description': str(record['description']),
+                'price': float(record['price']),
+                'amount': int(record['amount']),
+                'views': int(record.get('views') or 0),
+                'images': [image_name(image) for image in record.get('images') or []],
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            raise ImportRowError(f"Invalid row: {e}")
+
+    def load(self, rows):
+        """Insert one batch of cleaned rows in a transaction. Returns ``(created, updated)``."""
+        # Later rows win when the same description repeats inside a batch
+        rows = list({row['description']: row for row in rows}.values())
+        with transaction.atomic():
+            if self.use_copy:
+                saved = self.copy_rows(rows)
+            else:
+                saved = self.bulk_create_rows(rows)
+
+            images = {row['description']: row['images'] for row in rows}
+            if self.on_conflict == 'update':
+                CarImage.objects.filter(car_id__in=[car_id for car_id, _, created in saved if not created]).delete()
+            created_images = CarImage.objects.bulk_create([
+                CarImage(car_id=car_id, image=image, position=position)
+                for car_id, description, _ in saved
+                for position, image in enumerate(images[description])
+            ])
+            ImageBlob.objects.retain([image.image.name for image in created_images])
+            transaction.on_commit(
+                lambda: schedule_variants([(image.id, image.image.name) for image in created_images]))
+        created = sum(1 for _, _, was_created in saved if was_created)
+        return created, len(saved) - created
+
+    def copy_rows(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([self.user_id, row['model_id'], row['title'], row['description'], row['price'],
+                             row['amount'], row['views']])
+        buffer.seek(0)
+
+        if self.on_conflict == 'skip':
+            conflict = "ON CONFLICT (description) DO NOTHING"
+        elif self.on_conflict == 'update':
+            conflict = ("ON CONFLICT (description) DO UPDATE SET title = EXCLUDED.title, price = EXCLUDED.price, "
+                        "amount = EXCLUDED.amount, model_id = EXCLUDED.model_id, updated_at = EXCLUDED.updated_at")
+        else:
+            conflict = ""
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS carapp_car_import ("
+                "user_id bigint, model_id bigint, title varchar(100), description text, "
+                "price double precision, amount integer, views integer)"
+            )
+            cursor.execute("TRUNCATE carapp_car_import")
+            cursor.copy_expert("COPY carapp_car_import FROM STDIN WITH (FORMAT csv)", buffer)
+            # Imported views are history, not new activity: trending_views starts level with them.
+            # xmax = 0 only for freshly inserted rows, which separates inserts from updates
+            cursor.execute(
+                "INSERT INTO carapp_car (user_id, model_id, title, description, price, amount, views, "
+                "trending_score, trending_views, favourites_count, is_deleted, created_at, updated_at) "
+                "SELECT user_id, model_id, title, description, price, amount, views, 0, views, 0, false, now(), now() "
+                f"FROM carapp_car_import {conflict} RETURNING id, description, (xmax = 0)"
+            )
+            return cursor.fetchall()
+
+    def bulk_create_rows(self, rows):
+        existing = dict(Car.objects.filter(description__in=[row['description'] for row in rows])
+                        .values_list('description', 'id'))
+        if self.on_conflict == 'skip':
+            rows = [row for row in rows if row['description'] not in existing]
+
+        cars = [
+            Car(user_id=self.user_id, model_id=row['model_id'], title=row['title'], description=row['description'],
+                price=row['price'], amount=row['amount'], views=row['views'], trending_views=row['views'])
+            for row in rows
+        ]
+        if self.on_conflict == 'update':
+            cars = Car.objects.bulk_create(cars, update_conflicts=True, unique_fields=['description'],
+                                           update_fields=UPDATE_FIELDS)
+        else:
+            cars = Car.objects.bulk_create(cars)
+        return [(car.pk, car.description, car.description not in existing) for car in cars]
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from carapp.models import CarImage
+from carapp.variants import build_variants
+
+
+class Command(BaseCommand):
+    help = "Render thumbnail and WebP variants for car images that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-render images that already have variants")
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        images = CarImage.objects.order_by('id')
+        if not options['all']:
+            images = images.filter(variants={})
+
+        batch, total = [], 0
+        for image_id, name in images.values_list('id', 'image').iterator(chunk_size=options['batch_size']):
+            batch.append((image_id, name))
+            if len(batch) == options['batch_size']:
+                total += build_variants(batch)
+                batch = []
+        total += build_variants(batch)
+        self.stdout.write(self.style.SUCCESS(f"Rendered variants for {total} images"))
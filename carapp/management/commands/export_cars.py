@@ -0,0 +1,25 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from carapp.export import EXPORT_FORMATS, export_cars
+
+
+class Command(BaseCommand):
+    help = "Stream every non-deleted car with its model name and image URLs as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help="Gzip-compress the output")
+        parser.add_argument('--output', '-o', help="Output file (defaults to stdout)")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows fetched per database round trip")
+
+    def handle(self, *args, **options):
+        chunks = export_cars(options['format'], options['gzip'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                output.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Exported cars to {options['output']}"))
+        else:
+            sys.stdout.buffer.writelines(chunks)
+            sys.stdout.buffer.flush()
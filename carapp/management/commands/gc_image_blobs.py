@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from carapp.models import CarImage, ImageBlob
+
+
+class Command(BaseCommand):
+    help = "Delete stored images that no CarImage references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=24,
+                            help="Only collect blobs not stored for this many hours (unattached uploads are kept)")
+        parser.add_argument('--recount', action='store_true',
+                            help="Recompute every reference count from CarImage before collecting")
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            references = (CarImage.objects.filter(image=OuterRef('name')).order_by()
+                          .values('image').annotate(total=Count('id')).values('total'))
+            updated = ImageBlob.objects.update(refcount=Coalesce(Subquery(references), 0))
+            self.stdout.write(f"Recounted references for {updated} blobs")
+
+        touched_before = timezone.now() - timedelta(hours=options['min_age'])
+        collected = ImageBlob.objects.collect(touched_before=touched_before)
+        self.stdout.write(self.style.SUCCESS(f"Collected {collected} unreferenced blobs"))
@@ -0,0 +1,95 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ("Fire concurrent GET requests at a running server and report throughput and latency, "
+            "e.g. to compare the WSGI and ASGI deployments of the catalogue endpoints.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="Base URL of the server, e.g. http://127.0.0.1:8000")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Path to request; repeat to rotate through several (default: /cars/ and /models/)")
+        parser.add_argument('--requests', type=int, default=2000, help="Total number of requests")
+        parser.add_argument('--concurrency', type=int, default=50, help="Number of keep-alive connections")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported.")
+        paths = options['paths'] or ['/cars/', '/models/']
+
+        started = time.monotonic()
+        latencies, errors = asyncio.run(self.run(url.hostname, url.port or 80, paths,
+                                                 options['requests'], options['concurrency']))
+        elapsed = time.monotonic() - started
+
+        if not latencies:
+            raise CommandError(f"All {errors} requests failed.")
+        latencies.sort()
+        percentile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s), {errors} errors; "
+            f"latency p50 {percentile(0.5):.1f}ms, p95 {percentile(0.95):.1f}ms, p99 {percentile(0.99):.1f}ms, "
+            f"mean {statistics.mean(latencies) * 1000:.1f}ms"
+        ))
+
+    async def run(self, host, port, paths, total, concurrency):
+        queue = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(paths[i % len(paths)])
+        latencies = []
+        errors = []
+        await asyncio.gather(*(self.worker(host, port, queue, latencies, errors) for _ in range(concurrency)))
+        return latencies, len(errors)
+
+    async def worker(self, host, port, queue, latencies, errors):
+        reader = writer = None
+        while not queue.empty():
+            path = queue.get_nowait()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                started = time.monotonic()
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n\r\n".encode())
+                status, keep_alive = await self.read_response(reader)
+                latencies.append(time.monotonic() - started)
+                if status >= 400:
+                    errors.append(status)
+                if not keep_alive:
+                    writer.close()
+                    reader = writer = None
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                errors.append(e)
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    async def read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await reader.readexactly(int(headers.get('content-length', 0)))
+        return status, headers.get('connection') != 'close'
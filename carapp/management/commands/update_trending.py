@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from carapp.cache import bump_catalogue_version
+from carapp.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = "Fold new car views into the time-decayed trending score. Run it periodically (e.g. every few minutes)."
+
+    def handle(self, *args, **options):
+        updated = update_trending()
+        if updated:
+            # update() sends no signals
+            bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(f"Updated the trending score of {updated} cars"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0001_initial'),
+        ('modelapp', '0001_initial'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['-views', '-id'], name='car_views_id_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:27
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+import utils.migrations
+
+CREATE_TRIGGER_SQL = """
+CREATE FUNCTION carapp_car_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER carapp_car_search_vector
+    BEFORE INSERT OR UPDATE OF title, description ON carapp_car
+    FOR EACH ROW EXECUTE FUNCTION carapp_car_search_vector_update();
+
+UPDATE carapp_car SET search_vector =
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'B');
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS carapp_car_search_vector ON carapp_car;
+DROP FUNCTION IF EXISTS carapp_car_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0002_car_views_id_idx'),
+        ('modelapp', '0001_initial'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        utils.migrations.AddPostgresIndex(
+            model_name='car',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='car_search_vector_idx'),
+        ),
+        utils.migrations.RunPostgresSQL(
+            sql=CREATE_TRIGGER_SQL,
+            reverse_sql=DROP_TRIGGER_SQL,
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:28
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+import utils.migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0003_car_search_vector'),
+        ('modelapp', '0002_model_name_trgm_idx'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        utils.migrations.AddPostgresIndex(
+            model_name='car',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='car_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
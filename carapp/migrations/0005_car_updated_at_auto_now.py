@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0004_car_title_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='car',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
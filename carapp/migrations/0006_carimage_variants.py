@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0005_car_updated_at_auto_now'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
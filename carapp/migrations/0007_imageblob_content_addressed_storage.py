@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:37
+
+import carapp.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0006_carimage_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='carimage',
+            name='image',
+            field=models.ImageField(storage=carapp.storage.ContentAddressedStorage(), upload_to='product_images/'),
+        ),
+    ]
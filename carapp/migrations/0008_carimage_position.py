@@ -0,0 +1,22 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0007_imageblob_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='carimage',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AddField(
+            model_name='carimage',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:42
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_from_current_views(apps, schema_editor):
+    # Lifetime views predate the score; only views counted from now on make a car trend
+    Car = apps.get_model('carapp', 'Car')
+    Car.objects.update(trending_views=F('views'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0008_carimage_position'),
+        ('modelapp', '0002_model_name_trgm_idx'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='trending_score',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='trending_views',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(start_from_current_views, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['-trending_score', '-id'], name='car_trending_id_idx'),
+        ),
+    ]
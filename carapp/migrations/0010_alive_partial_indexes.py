@@ -0,0 +1,35 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0009_car_trending_score'),
+        ('modelapp', '0002_model_name_trgm_idx'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='car',
+            name='car_views_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='car',
+            name='car_trending_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-views', '-id'], name='car_views_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-trending_score', '-id'], name='car_trending_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['price'], name='car_alive_price_idx'),
+        ),
+    ]
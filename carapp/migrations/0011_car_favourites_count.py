@@ -0,0 +1,36 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:09
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_favourites(apps, schema_editor):
+    Car = apps.get_model('carapp', 'Car')
+    FeaturedCar = apps.get_model('featured_productapp', 'FeaturedCar')
+    favourites = (FeaturedCar.objects.filter(car=OuterRef('pk'), is_deleted=False).order_by()
+                  .values('car').annotate(total=Count('id')).values('total'))
+    Car.objects.update(favourites_count=Coalesce(Subquery(favourites), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0010_alive_partial_indexes'),
+        ('featured_productapp', '0003_featured_car_unique'),
+        ('modelapp', '0002_model_name_trgm_idx'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='favourites_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_favourites, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-favourites_count', '-id'], name='car_favourites_id_idx'),
+        ),
+    ]
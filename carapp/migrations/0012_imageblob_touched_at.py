@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0011_car_favourites_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageblob',
+            name='touched_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
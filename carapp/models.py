@@ -1,6 +1,35 @@
-from django.db import models
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 from userapp.models import UserProfile
 from modelapp.models import Model
+from carapp.cache import bump_catalogue_version
+from carapp.storage import image_storage
+from carapp.thumbnails import FORMATS, variant_name
+from utils.managers import SoftDeleteQuerySet, alive_index
+
+
+class CarQuerySet(SoftDeleteQuerySet):
+    def for_listing(self):
+        return self.select_related('model').prefetch_related('images').defer('search_vector')
+
+    def adjust_favourites(self, deltas):
+        """Apply ``{car_id: delta}`` to favourites_count with one UPDATE per distinct delta."""
+        by_delta = defaultdict(list)
+        for car_id, delta in deltas.items():
+            if delta:
+                by_delta[delta].append(car_id)
+        for delta, car_ids in by_delta.items():
+            self.filter(id__in=car_ids).update(favourites_count=F('favourites_count') + delta)
+        if by_delta:
+            # The counter is listed and ordered on, and update() sends no post_save
+            transaction.on_commit(bump_catalogue_version)
 
 
 class Car(models.Model):
@@ -9,19 +38,106 @@ class Car(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     price = models.FloatField()
     amount = models.IntegerField()
     is_deleted = models.BooleanField(default=False)
     views = models.IntegerField(default=0)
+    # Log of the time-decayed view count, see carapp.trending
+    trending_score = models.FloatField(default=0.0, editable=False)
+    trending_views = models.IntegerField(default=0, editable=False)
+    # Live FeaturedCar rows pointing at this car, kept in step by featured_productapp
+    favourites_count = models.IntegerField(default=0, editable=False)
+    # Maintained by the carapp_car_search_vector trigger on PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = CarQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            alive_index('-views', '-id', name='car_views_id_idx'),
+            alive_index('-trending_score', '-id', name='car_trending_id_idx'),
+            alive_index('-favourites_count', '-id', name='car_favourites_id_idx'),
+            alive_index('price', name='car_alive_price_idx'),
+            GinIndex(fields=['search_vector'], name='car_search_vector_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='car_title_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class ImageBlobQuerySet(models.QuerySet):
+    def retain(self, names):
+        """Add one reference per occurrence of a stored name; names not in the blob store are ignored."""
+        self._adjust(names, 1)
+
+    def release(self, names):
+        self._adjust(names, -1)
+        names = list(names)
+        transaction.on_commit(lambda: self.model.objects.collect(
+            names, touched_before=timezone.now() - timedelta(seconds=settings.CAR_IMAGE_BLOB_GRACE_SECONDS)))
+
+    def _adjust(self, names, sign):
+        counts = {}
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+        by_amount = {}
+        for name, count in counts.items():
+            by_amount.setdefault(count, []).append(name)
+        for count, group in by_amount.items():
+            self.filter(name__in=group).update(refcount=F('refcount') + sign * count)
+
+    def collect(self, names=None, touched_before=None):
+        """
+        Delete blobs that are no longer referenced, together with their files and variants.
+
+        Blobs stored again since ``touched_before`` are kept: an upload that
+        matches an unreferenced blob is only attached to a car after it is
+        saved. The files are removed while the rows are still locked, so a
+        concurrent save of the same content waits and then writes its file anew.
+        """
+        with transaction.atomic():
+            blobs = self.select_for_update().filter(refcount__lte=0)
+            if names is not None:
+                blobs = blobs.filter(name__in=names)
+            if touched_before is not None:
+                blobs = blobs.filter(touched_at__lt=touched_before)
+            garbage = list(blobs.values_list('digest', 'name'))
+            self.filter(digest__in=[digest for digest, _ in garbage]).delete()
+
+            for _, name in garbage:
+                image_storage.delete(name)
+                for size in settings.CAR_IMAGE_VARIANT_SIZES:
+                    for image_format in FORMATS:
+                        image_storage.delete(variant_name(name, size, image_format))
+        return len(garbage)
+
+
+class ImageBlob(models.Model):
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last time the content was stored, see ContentAddressedStorage._save
+    touched_at = models.DateTimeField(default=timezone.now)
+
+    objects = ImageBlobQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} references)"
+
+
 class CarImage(models.Model):
     car = models.ForeignKey(Car, on_delete=models.CASCADE, null=True, related_name='images')
-    image = models.ImageField(upload_to="product_images/")
+    image = models.ImageField(upload_to="product_images/", storage=image_storage)
+    position = models.PositiveIntegerField(default=0)
+    # {"<size>": {"jpeg": <name>, "webp": <name>}}, filled in by carapp.variants
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['position', 'id']
 
     def __str__(self):
         return f"Image for {self.car.title}"
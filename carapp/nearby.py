@@ -0,0 +1,39 @@
+from addressapp.models import Address
+from carapp.models import Car
+
+
+def seller_distances(latitude, longitude, radius_km):
+    """Distance in km to the nearest live address of every seller with one within ``radius_km``."""
+    distances = {}
+    for address in Address.objects.alive().within(latitude, longitude, radius_km):
+        # Nearest first, so the first address seen for a seller is the closest one
+        distances.setdefault(address.user_id, address.distance_km)
+    return distances
+
+
+def nearby_cars(latitude, longitude, radius_km, paginator, cursor=None):
+    """
+    One page of live cars whose seller has an address within ``radius_km``, nearest first.
+
+    Only (id, user) pairs of the matching sellers' cars are read to order
+    them; full rows are loaded for the page alone. Each car gets a
+    ``distance`` attribute, which is also the first cursor field.
+    """
+    distances = seller_distances(latitude, longitude, radius_km)
+    if not distances:
+        return []
+
+    candidates = sorted((distances[user_id], car_id) for car_id, user_id in
+                        Car.objects.alive().filter(user_id__in=distances).values_list('id', 'user_id'))
+    if cursor:
+        after = tuple(paginator.decode_cursor(cursor))
+        candidates = [candidate for candidate in candidates if candidate > after]
+    candidates = candidates[:paginator.page_size + 1]
+
+    cars = Car.objects.for_listing().in_bulk([car_id for _, car_id in candidates])
+    page = []
+    for distance, car_id in candidates:
+        car = cars[car_id]
+        car.distance = distance
+        page.append(car)
+    return paginator.paginate_rows(page)
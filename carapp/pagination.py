@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+import math
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Cursor pagination over a fixed, unique ordering.
+
+    The cursor holds the ordering values of the last row of the page, so the
+    next page is a range condition on the matching index instead of an OFFSET.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering, page_size=None):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size or settings.CAR_LIST_PAGE_SIZE
+        self.next_cursor = None
+
+    def encode_cursor(self, values):
+        payload = json.dumps({'o': self.ordering, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = payload['v']
+            ordering = tuple(payload['o'])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        if ordering != self.ordering or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValidationError({self.cursor_query_param: 'Cursor does not match the requested ordering.'})
+        if not all(self.valid_value(field, value) for field, value in zip(self.ordering, values)):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        return values
+
+    def valid_value(self, field, value):
+        # Every ordering key is numeric and ends in the integer id
+        if field.lstrip('-') == 'id':
+            return isinstance(value, int) and not isinstance(value, bool)
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+    def seek_filter(self, values):
+        # (a, b) < (x, y)  ==>  a < x OR (a = x AND b < y), per-field direction aware
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def page_queryset(self, queryset, cursor=None):
+        if cursor:
+            queryset = queryset.filter(self.seek_filter(self.decode_cursor(cursor)))
+        # One row past the page tells whether there is a next page
+        return queryset.order_by(*self.ordering)[:self.page_size + 1]
+
+    def paginate_queryset(self, queryset, cursor=None):
+        return self.paginate_rows(list(self.page_queryset(queryset, cursor)))
+
+    async def apaginate_queryset(self, queryset, cursor=None):
+        return self.paginate_rows([row async for row in self.page_queryset(queryset, cursor)])
+
+    def paginate_rows(self, rows):
+        page = rows[:self.page_size]
+        if len(rows) > self.page_size:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor([getattr(last, field.lstrip('-')) for field in self.ordering])
+        return page
+
+    def get_next_link(self, request):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, request, data):
+        return {
+            'next': self.get_next_link(request),
+            'results': data,
+        }
@@ -0,0 +1,27 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
+# Must match the configuration used by the carapp_car_search_vector trigger.
+SEARCH_CONFIG = 'simple'
+
+
+def search_cars(queryset, query):
+    """
+    Filter ``queryset`` down to cars matching ``query`` and annotate ``rank``.
+
+    On PostgreSQL this is a ranked match against the trigger-maintained
+    ``search_vector`` column (title weighted A, description weighted B).
+    Other backends fall back to a case-insensitive substring match with a
+    constant rank so callers can order by ``-rank`` everywhere.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        # Cast float4 -> float8 so the rank round-trips exactly through a pagination cursor
+        rank = Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        return queryset.filter(search_vector=search_query).annotate(rank=rank)
+
+    return queryset.filter(
+        Q(title__icontains=query) | Q(description__icontains=query)
+    ).annotate(rank=Value(0.0, output_field=FloatField()))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from carapp.models import *
 from modelapp.serializers import CategorySerializer
@@ -6,10 +7,28 @@ from modelapp.serializers import CategorySerializer
 class CarImageSerializer(serializers.ModelSerializer):
     product = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to="product_images/")
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = CarImage
-        fields = ['image']
+        fields = ['id', 'image', 'variants']
+
+    def get_variants(self, obj):
+        storage = obj.image.storage
+        return {
+            size: {image_format: storage.url(name) for image_format, name in formats.items()}
+            for size, formats in obj.variants.items()
+        }
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Let list views ask for small images: serve the smallest variant at least `image_size` wide
+        image_size = self.context.get('image_size')
+        if image_size and data['variants']:
+            sizes = sorted(data['variants'], key=int)
+            size = next((s for s in sizes if int(s) >= image_size), sizes[-1])
+            data['image'] = data['variants'][size]['jpeg']
+        return data
 
 
 class CarSerializer(serializers.ModelSerializer):
@@ -18,8 +37,15 @@ class CarSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Car
-        fields = ['id', 'user', 'model', 'title', 'description', 'price', 'amount', 'images', 'default_account',
-                  "views"]
+        fields = ['id', 'user', 'model', 'title', 'description', 'price', 'amount', 'images', "views",
+                  'favourites_count']
+
+
+class NearbyCarSerializer(CarSerializer):
+    distance_km = serializers.FloatField(source='distance', read_only=True)
+
+    class Meta(CarSerializer.Meta):
+        fields = CarSerializer.Meta.fields + ['distance_km']
 
 
 class CarUpDateNewSerializer(serializers.ModelSerializer):
@@ -29,8 +55,7 @@ class CarUpDateNewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Car
-        fields = ['id', 'user', 'model', 'title', 'description', 'price', 'amount', 'images', 'default_account',
-                  "views"]
+        fields = ['id', 'user', 'model', 'title', 'description', 'price', 'amount', 'images', "views"]
 
 
 class CarUpdateSerializer(serializers.Serializer):
@@ -39,11 +64,30 @@ class CarUpdateSerializer(serializers.Serializer):
     price = serializers.FloatField(required=False)
     amount = serializers.IntegerField(required=False)
     is_deleted = serializers.BooleanField(required=False)
+    # Ordered ids of the existing images to keep; new uploads in `cover_img` are appended after them
+    images = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate_images(self, value):
+        existing = set(self.instance.images.values_list('id', flat=True))
+        unknown = [image_id for image_id in value if image_id not in existing]
+        if unknown:
+            raise serializers.ValidationError(f"Images {unknown} do not belong to this car.")
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Images must not repeat.")
+        return value
 
     def validate(self, data):
         # Your validation logic if needed
         return data
 
+    def update(self, instance, validated_data):
+        validated_data.pop('images', None)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        # Only the edited columns, so counters updated meanwhile (views, favourites_count, ...) survive
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
 
 class CarQuerySerializer(serializers.Serializer):
     show_own_products = serializers.BooleanField(default=False, help_text="Show own products or not")
@@ -51,3 +95,39 @@ class CarQuerySerializer(serializers.Serializer):
     min_price = serializers.DecimalField(required=False, min_value=0, max_digits=10, decimal_places=2)
     max_price = serializers.DecimalField(required=False, min_value=0, max_digits=10, decimal_places=2)
     model = serializers.CharField(required=False)
+    cursor = serializers.CharField(required=False, help_text="Opaque cursor returned in `next`")
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=settings.CAR_LIST_MAX_PAGE_SIZE)
+    image_size = serializers.IntegerField(required=False, min_value=1,
+                                          help_text="Return image URLs of a variant at least this many pixels wide")
+    ordering = serializers.ChoiceField(choices=['views', 'trending', 'favourites', 'relevance'], required=False,
+                                       help_text="Defaults to relevance when searching, views otherwise")
+    include_facets = serializers.BooleanField(default=False,
+                                              help_text="Also return per-model and per-price-bucket counts")
+
+
+class CarNearbyQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(min_value=0, max_value=settings.CAR_NEARBY_MAX_RADIUS_KM,
+                                       help_text="Search radius around lat/lon in kilometres")
+    cursor = serializers.CharField(required=False, help_text="Opaque cursor returned in `next`")
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=settings.CAR_LIST_MAX_PAGE_SIZE)
+
+
+class CarBulkItemSerializer(serializers.Serializer):
+    model = serializers.IntegerField()
+    title = serializers.CharField(max_length=100)
+    description = serializers.CharField()
+    price = serializers.FloatField()
+    amount = serializers.IntegerField()
+    cover_img = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+
+
+class CarExportQuerySerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(choices=['ndjson', 'csv'], default='ndjson')
+    gzip = serializers.BooleanField(default=False)
+
+
+class CarAutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100, help_text="Partial car or model name")
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=settings.CAR_AUTOCOMPLETE_MAX_LIMIT)
@@ -0,0 +1,79 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from carapp.cache import bump_catalogue_version
+from carapp.models import Car, CarImage, ImageBlob
+from carapp.variants import schedule_variants
+
+_local = threading.local()
+
+
+class ImageChanges:
+    """Side effects of CarImage writes, applied together by batched_image_changes()."""
+
+    def __init__(self):
+        self.retained = []
+        self.released = []
+        self.created = []
+        self.car_ids = set()
+
+    def apply(self):
+        if self.retained:
+            ImageBlob.objects.retain(self.retained)
+        if self.released:
+            ImageBlob.objects.release(self.released)
+        if self.car_ids:
+            # Image changes are part of the car payload, so they must move its Last-Modified/ETag
+            Car.objects.filter(id__in=self.car_ids).update(updated_at=timezone.now())
+        if self.created:
+            created = list(self.created)
+            transaction.on_commit(lambda: schedule_variants(created))
+        transaction.on_commit(bump_catalogue_version)
+
+
+@contextmanager
+def batched_image_changes():
+    """
+    Collect the side effects of the CarImage writes made inside the block and apply them once on exit.
+
+    Blob references, the car touch and the cache bump then cost one statement
+    each however many images are saved or deleted. Nested blocks join the
+    outermost one.
+    """
+    if getattr(_local, 'changes', None) is not None:
+        yield _local.changes
+        return
+    _local.changes = changes = ImageChanges()
+    try:
+        yield changes
+    finally:
+        _local.changes = None
+    changes.apply()
+
+
+@receiver([post_save, post_delete], sender=Car)
+def invalidate_car_list_cache(sender, **kwargs):
+    transaction.on_commit(bump_catalogue_version)
+
+
+@receiver(post_save, sender=CarImage)
+def record_saved_image(sender, instance, created, **kwargs):
+    with batched_image_changes() as changes:
+        if instance.car_id:
+            changes.car_ids.add(instance.car_id)
+        if created:
+            changes.retained.append(instance.image.name)
+            changes.created.append((instance.id, instance.image.name))
+
+
+@receiver(post_delete, sender=CarImage)
+def record_deleted_image(sender, instance, **kwargs):
+    with batched_image_changes() as changes:
+        if instance.car_id:
+            changes.car_ids.add(instance.car_id)
+        changes.released.append(instance.image.name)
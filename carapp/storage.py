@@ -0,0 +1,79 @@
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File storage that names every file after the SHA-256 of its content.
+
+    The hash is computed while the upload is streamed to a temporary file, so
+    large uploads are read once. Identical uploads map to the same name and
+    only the first copy is kept on disk; each unique file is tracked by an
+    ``ImageBlob`` row holding its reference count.
+    """
+    prefix = 'cas'
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save()
+        return name
+
+    def blob_name(self, digest, name):
+        extension = os.path.splitext(name)[1].lower()
+        return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def content_name(self, content):
+        """Return the name ``content`` would be stored under, without storing it."""
+        hasher = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        content.seek(0)
+        digest = hasher.hexdigest()
+        ImageBlob = apps.get_model('carapp', 'ImageBlob')
+        stored = ImageBlob.objects.filter(digest=digest).values_list('name', flat=True).first()
+        return stored or self.blob_name(digest, content.name)
+
+    def _save(self, name, content):
+        tmp_dir = self.path(os.path.join(self.prefix, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        hasher = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks():
+                hasher.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+
+        digest = hasher.hexdigest()
+
+        # Touching the row under its lock keeps ImageBlob.objects.collect() off this blob until
+        # it is attached; a collect that got the lock first has removed the file by the time
+        # we get it, so the check below puts it back
+        ImageBlob = apps.get_model('carapp', 'ImageBlob')
+        blob, _ = ImageBlob.objects.update_or_create(digest=digest, defaults={'touched_at': timezone.now()},
+                                                     create_defaults={'name': self.blob_name(digest, name),
+                                                                      'size': size})
+        # The same bytes uploaded under another extension reuse the tracked file
+        final_name = blob.name
+        final_path = self.path(final_name)
+
+        if os.path.exists(final_path):
+            os.remove(tmp.name)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.chmod(tmp.name, self.file_permissions_mode or 0o644)
+            os.replace(tmp.name, final_path)
+        return final_name
+
+
+image_storage = ContentAddressedStorage()
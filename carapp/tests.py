@@ -1,3 +1,767 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlsplit
 
-# Tests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import QuerySet
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from addressapp.models import Address
+from carapp.async_views import AsyncCarDetail, AsyncCarList
+from carapp.autocomplete import PrefixTrie, get_trie, trigram_suggest
+from carapp.bulk import sync_car_images
+from carapp.cache import bump_catalogue_version, car_list_cache_key, catalogue_cache, catalogue_version
+from carapp.counters import ViewCounter, view_counter
+from carapp.models import Car, CarImage, ImageBlob, ImageBlobQuerySet
+from carapp.pagination import KeysetPagination
+from carapp.search import search_cars
+from carapp.serializers import CarQuerySerializer, CarUpdateSerializer
+from carapp.storage import image_storage
+from carapp.trending import TRENDING_EPOCH, decay_rate, update_trending
+from carapp.variants import build_variants, discard_executor, schedule_variants
+from modelapp.models import Model
+from userapp.cache import profile_cache
+from userapp.models import UserProfile
+from utils.testing import ExplainTestMixin
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'versions'},
+    'catalogue': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+})
+class CarListQueryCountTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.user = UserProfile.objects.create_user(username='seller', password='secret', age=30)
+
+    def create_cars(self, count, images_per_car=3):
+        for i in range(Car.objects.count(), Car.objects.count() + count):
+            car = Car.objects.create(user=self.user, model=self.model, title=f'Car {i}',
+                                     description=f'Description {i}', price=1000 + i, amount=1)
+            for j in range(images_per_car):
+                CarImage.objects.create(car=car, image=f'product_images/{i}_{j}.jpg')
+
+    def test_car_list_query_count_is_constant(self):
+        # cars joined with their model + one prefetch for all images; the validators come from the page
+        self.create_cars(1)
+        with self.assertNumQueries(2):
+            response = self.client.get('/cars/')
+        self.assertEqual(len(response.data['results']), 1)
+
+        self.create_cars(9)
+        with self.assertNumQueries(2):
+            response = self.client.get('/cars/')
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(len(response.data['results'][0]['images']), 3)
+
+    def test_car_user_query_count_is_constant(self):
+        # user lookup + cars joined with their model + one prefetch for all images
+        self.create_cars(1)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/cars/{self.user.id}/user/')
+        self.assertEqual(len(response.data), 1)
+
+        self.create_cars(9)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/cars/{self.user.id}/user/')
+        self.assertEqual(len(response.data), 10)
+
+    def test_etag_follows_the_page_only(self):
+        self.create_cars(3, images_per_car=0)
+        first, _, last = Car.objects.order_by('-views', '-id')
+        response = self.client.get('/cars/', {'page_size': 2})
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/cars/', {'page_size': 2}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Flushed view counts change no version, only the rows
+        Car.objects.filter(id=last.id).update(views=1)
+        self.assertEqual(self.client.get('/cars/', {'page_size': 2}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(CAR_PRICE_FACET_BUCKETS=(1005,))
+    def test_facets_come_from_one_query(self):
+        self.create_cars(10, images_per_car=1)
+        other = Model.objects.create(model_name='Honda', description='Also Japanese')
+        Car.objects.create(user=self.user, model=other, title='Civic', description='Hatchback', price=2000, amount=1)
+
+        # model lookup + facet query + cars joined with their model + images
+        with self.assertNumQueries(4):
+            response = self.client.get('/cars/', {'include_facets': 'true', 'model': self.model.id,
+                                                  'max_price': 1004})
+        self.assertEqual(len(response.data['results']), 5)
+        facets = response.data['facets']
+        self.assertEqual([(item['name'], item['count']) for item in facets['model']], [('Toyota', 5), ('Honda', 0)])
+        self.assertEqual([(item['min'], item['max'], item['count']) for item in facets['price']],
+                         [(None, 1005, 5), (1005, None, 5)])
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'versions'},
+    'catalogue': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+})
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        # Ties on views are broken by id
+        for i, views in enumerate([5, 3, 3, 3, 1]):
+            Car.objects.create(model=model, title=f'Car {i}', description=f'Description {i}', price=1000,
+                               amount=1, views=views)
+
+    def test_next_page_continues_where_the_previous_ended(self):
+        expected = list(Car.objects.order_by('-views', '-id').values_list('id', flat=True))
+        ids, params = [], {'page_size': 2}
+        while True:
+            response = self.client.get('/cars/', params)
+            self.assertEqual(response.status_code, 200)
+            ids += [car['id'] for car in response.data['results']]
+            if response.data['next'] is None:
+                break
+            params['cursor'] = parse_qs(urlsplit(response.data['next']).query)['cursor'][0]
+        self.assertEqual(ids, expected)
+
+    def test_malformed_cursor_is_rejected(self):
+        paginator = KeysetPagination(('-views', '-id'))
+        other_ordering = KeysetPagination(('-trending_score', '-id'))
+        for cursor in ['not-a-cursor', paginator.encode_cursor(['many', 3]), paginator.encode_cursor([3, 1.5]),
+                       paginator.encode_cursor([3]), other_ordering.encode_cursor([1, 2])]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/cars/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.data)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'versions'},
+    'catalogue': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+})
+class AsyncCatalogueViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.factory = AsyncRequestFactory()
+        self.model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.cars = [Car.objects.create(model=self.model, title=f'Car {i}', description=f'Description {i}',
+                                        price=1000 + i, amount=1) for i in range(3)]
+        CarImage.objects.create(car=self.cars[0], image='product_images/0.jpg')
+
+    async def test_car_list_matches_sync_view(self):
+        params = {'include_facets': 'true', 'page_size': 2, 'model': self.model.id}
+        response = await AsyncCarList.as_view()(self.factory.get('/cars/', params))
+        self.assertEqual(response.status_code, 200)
+        expected = await self.sync_get('/cars/', params)
+        self.assertEqual(json.loads(response.content), expected.json())
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+        not_modified = await AsyncCarList.as_view()(
+            self.factory.get('/cars/', params, headers={'If-None-Match': response['ETag']}))
+        self.assertEqual(not_modified.status_code, 304)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'async-versions'},
+        'catalogue': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'async-catalogue'},
+    })
+    async def test_car_list_shares_the_sync_cache(self):
+        params = {'page_size': 2}
+        response = await AsyncCarList.as_view()(self.factory.get('/cars/', params))
+        self.assertEqual(response.status_code, 200)
+
+        query = CarQuerySerializer(data=params)
+        query.is_valid()
+        key = car_list_cache_key(await sync_to_async(catalogue_version)(), query.validated_data)
+        cached = await sync_to_async(catalogue_cache().get)(key)
+        self.assertEqual(cached['etag'], response['ETag'])
+
+    async def test_car_list_rejects_unknown_model(self):
+        response = await AsyncCarList.as_view()(self.factory.get('/cars/', {'model': 0}))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_car_detail_counts_views(self):
+        car = self.cars[0]
+        response = await AsyncCarDetail.as_view()(self.factory.get(f'/cars/{car.id}/'), _id=car.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['images']), 1)
+        self.assertEqual(view_counter.pending(car.id), 1)
+
+        missing = await AsyncCarDetail.as_view()(self.factory.get('/cars/0/'), _id=0)
+        self.assertEqual(missing.status_code, 404)
+
+    def tearDown(self):
+        view_counter.flush()
+
+    async def sync_get(self, path, params):
+        return await sync_to_async(self.client.get)(path, params)
+
+
+@override_settings(CAR_VIEWS_FLUSH_SIZE=3, CAR_VIEWS_FLUSH_INTERVAL=3600)
+class ViewCounterTest(TestCase):
+    def setUp(self):
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.cars = [Car.objects.create(model=model, title=f'Car {i}', description=f'Description {i}', price=1000,
+                                        amount=1) for i in range(2)]
+        self.counter = ViewCounter()
+
+    def views(self):
+        return [car.views for car in Car.objects.filter(id__in=[car.id for car in self.cars]).order_by('id')]
+
+    def test_views_are_buffered_until_the_flush_size(self):
+        first, second = self.cars
+        with self.assertNumQueries(0):
+            self.counter.incr(first.id)
+            self.counter.incr(second.id)
+        self.assertEqual(self.views(), [0, 0])
+
+        # One UPDATE per distinct amount (first +2, second +1), inside a savepoint here
+        with self.assertNumQueries(4):
+            self.counter.incr(first.id)
+        self.assertEqual(self.views(), [2, 1])
+        self.assertEqual(self.counter.pending(first.id), 0)
+
+    def test_failed_flush_keeps_every_view_once(self):
+        first, second = self.cars
+        update = QuerySet.update
+        calls = []
+
+        def fail_second_batch(queryset, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise DatabaseError('connection lost')
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', fail_second_batch):
+            self.counter.incr(first.id, 2)
+            self.counter.incr(second.id)
+        self.assertEqual(self.views(), [0, 0])
+        self.assertEqual((self.counter.pending(first.id), self.counter.pending(second.id)), (2, 1))
+
+        self.counter.flush()
+        self.assertEqual(self.views(), [2, 1])
+
+
+@override_settings(CAR_VIEWS_FLUSH_SIZE=100, CAR_VIEWS_FLUSH_INTERVAL=0.2)
+class ViewCounterTimerTest(TransactionTestCase):
+    def test_quiet_process_flushes_after_the_interval(self):
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        car = Car.objects.create(model=model, title='Camry', description='Sedan', price=1000, amount=1)
+        counter = ViewCounter()
+        counter.incr(car.id)
+        counter.incr(car.id)
+        timer = counter._timer
+        self.assertEqual(counter.pending(car.id), 2)
+
+        # No further views arrive: the timer thread writes them
+        timer.join(5)
+        car.refresh_from_db()
+        self.assertEqual(car.views, 2)
+        self.assertEqual(counter.pending(car.id), 0)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'versions': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache_versions'},
+    'catalogue': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                  'LOCATION': os.path.join(tempfile.gettempdir(), 'car_backend_test_catalogue')},
+})
+class CarListCacheTest(TestCase):
+    def setUp(self):
+        caches['catalogue'].clear()
+        self.client = APIClient()
+        self.model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.car = Car.objects.create(model=self.model, title='Camry', description='Sedan', price=1000, amount=1)
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get('/cars/', {'min_price': 500})
+        # Only the shared version stamp is read from the database
+        with self.assertNumQueries(1):
+            second = self.client.get('/cars/', {'min_price': 500})
+        self.assertEqual(first.data, second.data)
+
+    def test_write_invalidates_cached_pages(self):
+        self.client.get('/cars/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Car.objects.create(model=self.model, title='Corolla', description='Hatchback', price=900, amount=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            CarImage.objects.create(car=self.car, image='product_images/camry.jpg')
+
+        response = self.client.get('/cars/')
+        self.assertEqual(len(response.data['results']), 2)
+        camry = next(car for car in response.data['results'] if car['id'] == self.car.id)
+        self.assertEqual(len(camry['images']), 1)
+
+
+class CarDetailImageUpdateTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.car = Car.objects.create(model=model, title='Camry', description='Sedan', price=1000, amount=1)
+        self.images = [CarImage.objects.create(car=self.car, image=f'product_images/{i}.jpg', position=i)
+                       for i in range(3)]
+
+    def test_reorder_and_remove_keeps_existing_rows(self):
+        first, second, third = self.images
+        response = self.client.put(f'/cars/{self.car.id}/', {'images': [third.id, first.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([image['id'] for image in response.data['images']], [third.id, first.id])
+        self.assertFalse(CarImage.objects.filter(id=second.id).exists())
+
+    def test_only_new_images_are_inserted(self):
+        first, second, _ = self.images
+        response = self.client.put(f'/cars/{self.car.id}/',
+                                   {'cover_img': [second.image.name, 'product_images/new.jpg', first.image.name]},
+                                   format='json')
+        self.assertEqual(response.status_code, 200)
+        ids = [image['id'] for image in response.data['images']]
+        self.assertEqual(ids[0], second.id)
+        self.assertEqual(ids[2], first.id)
+        self.assertNotIn(ids[1], [image.id for image in self.images])
+        self.assertEqual(self.car.images.count(), 3)
+
+    def test_unknown_image_is_rejected(self):
+        response = self.client.put(f'/cars/{self.car.id}/', {'images': [0]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_removing_images_costs_the_same_for_any_number(self):
+        counts = []
+        for keep in ([self.images[0].id, self.images[1].id], []):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.put(f'/cars/{self.car.id}/', {'images': keep}, format='json')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(self.car.images.exists())
+
+    def test_update_writes_only_the_edited_fields(self):
+        # A view counted after the car was loaded must not be overwritten
+        Car.objects.filter(id=self.car.id).update(views=7)
+        self.car.views = 0
+        serializer = CarUpdateSerializer(self.car, data={'title': 'Camry XLE'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.car.refresh_from_db()
+        self.assertEqual((self.car.title, self.car.views), ('Camry XLE', 7))
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.old = Car.objects.create(model=model, title='Old', description='Old favourite', price=1, amount=1)
+        self.new = Car.objects.create(model=model, title='New', description='New arrival', price=1, amount=1)
+
+    def test_recent_views_outrank_older_ones(self):
+        now = timezone.now()
+        Car.objects.filter(id=self.old.id).update(views=100)
+        self.assertEqual(update_trending(now - timedelta(days=10)), 1)
+        Car.objects.filter(id=self.new.id).update(views=10)
+        Car.objects.filter(id=self.old.id).update(views=101)
+        self.assertEqual(update_trending(now), 2)
+        self.assertEqual(update_trending(now), 0)
+
+        response = APIClient().get('/cars/', {'ordering': 'trending'})
+        self.assertEqual([car['id'] for car in response.data['results']], [self.new.id, self.old.id])
+        response = APIClient().get('/cars/')
+        self.assertEqual([car['id'] for car in response.data['results']], [self.old.id, self.new.id])
+
+    @override_settings(CAR_TRENDING_HALF_LIFE_HOURS=12)
+    def test_far_future_scores_do_not_underflow(self):
+        # A never-scored car (score 0) meets new views dated thousands of half-lives after the epoch
+        Car.objects.filter(id=self.new.id).update(views=3)
+        now = timezone.now() + timedelta(days=365 * 100)
+        self.assertEqual(update_trending(now), 1)
+        expected = math.log(3) + decay_rate() * (now - TRENDING_EPOCH).total_seconds()
+        self.assertAlmostEqual(Car.objects.get(id=self.new.id).trending_score, expected, places=6)
+
+
+class CarNearbyTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        sellers = {}
+        # ~0 km, ~8 km and ~270 km from the search point
+        for name, lat, lon in [('centre', '41.311081', '69.240562'), ('near', '41.350000', '69.320000'),
+                               ('far', '39.654167', '66.959722')]:
+            sellers[name] = UserProfile.objects.create_user(username=name, password='secret', age=30)
+            Address.objects.create(address_name=name, user=sellers[name], latitude=lat, longitude=lon)
+        self.cars = {
+            (name, i): Car.objects.create(user=seller, model=model, title=f'{name} {i}',
+                                          description=f'{name} {i}', price=1, amount=1)
+            for name, seller in sellers.items() for i in range(2)
+        }
+        Car.objects.filter(id=self.cars['near', 1].id).update(is_deleted=True)
+
+    def test_cars_of_nearby_sellers_nearest_first(self):
+        params = {'lat': 41.311081, 'lon': 69.240562, 'radius_km': 10, 'page_size': 2}
+        # addresses + (car, seller) pairs + the page's cars + their images
+        with self.assertNumQueries(4):
+            first = self.client.get('/cars/nearby/', params)
+        self.assertEqual([car['title'] for car in first.data['results']], ['centre 0', 'centre 1'])
+        self.assertEqual(first.data['results'][0]['distance_km'], 0)
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual([car['title'] for car in second.data['results']], ['near 0'])
+        self.assertAlmostEqual(second.data['results'][0]['distance_km'], 7.9, places=1)
+        self.assertIsNone(second.data['next'])
+
+    def test_radius_is_bounded(self):
+        response = self.client.get('/cars/nearby/', {'lat': 0, 'lon': 0, 'radius_km': 100000})
+        self.assertEqual(response.status_code, 400)
+
+
+class AliveIndexTest(ExplainTestMixin, TestCase):
+    def test_catalogue_queries_use_partial_indexes(self):
+        self.assertUsesIndex(Car.objects.alive().order_by('-views', '-id')[:30], 'car_views_id_idx')
+        self.assertUsesIndex(Car.objects.alive().order_by('-trending_score', '-id')[:30], 'car_trending_id_idx')
+        self.assertUsesIndex(Car.objects.alive().order_by('-favourites_count', '-id')[:30], 'car_favourites_id_idx')
+        self.assertUsesIndex(Car.objects.alive().filter(price__gte=1000, price__lte=5000), 'car_alive_price_idx')
+
+
+class ImportExportTest(TestCase):
+    def setUp(self):
+        self.model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.user = UserProfile.objects.create_user(username='seller', password='secret', age=30)
+        self.blob = ImageBlob.objects.create(digest='ab' * 32, name=f'cas/ab/ab/{"ab" * 32}.jpg', size=10)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def import_cars(self, path):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_cars', path, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_round_trip_keeps_image_names_and_references(self):
+        car = Car.objects.create(user=self.user, model=self.model, title='Corolla', description='Blue corolla',
+                                 price=1000, amount=1)
+        CarImage.objects.create(car=car, image=self.blob.name)
+        self.blob.refresh_from_db()
+        self.assertEqual(self.blob.refcount, 1)
+
+        for export_format in ('ndjson', 'csv'):
+            with self.subTest(export_format=export_format):
+                path = self.path(f'cars.{export_format}')
+                call_command('export_cars', format=export_format, output=path, stderr=StringIO())
+                Car.objects.all().delete()
+
+                self.import_cars(path)
+                car = Car.objects.get(description='Blue corolla')
+                self.assertEqual([image.image.name for image in car.images.all()], [self.blob.name])
+                self.blob.refresh_from_db()
+                self.assertEqual(self.blob.refcount, 1)
+
+    def test_bad_ndjson_lines_are_rejected_and_skipped(self):
+        path = self.path('cars.ndjson')
+        with open(path, 'w') as f:
+            f.write(json.dumps({'model': 'Toyota', 'title': 'A', 'description': 'First', 'price': 1, 'amount': 1}))
+            f.write('\n{"model": "Toyota", "title": \n')
+            f.write('[1, 2, 3]\n')
+            f.write(json.dumps({'model': 'Toyota', 'title': 'B', 'description': 'Second', 'price': 2, 'amount': 1}))
+            f.write('\n')
+
+        stdout, stderr = self.import_cars(path)
+        self.assertIn('Line 2: invalid JSON', stderr)
+        self.assertIn('Line 3: expected an object, got list', stderr)
+        self.assertIn('Imported 2 new and 0 updated cars, rejected 2 rows', stdout)
+        self.assertEqual(set(Car.objects.values_list('description', flat=True)), {'First', 'Second'})
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), CAR_IMAGE_VARIANT_SIZES=())
+class ImageBlobTest(TestCase):
+    def setUp(self):
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.car = Car.objects.create(model=model, title='Camry', description='Sedan', price=1000, amount=1)
+
+    def store(self, content=b'image bytes', name='product_images/photo.jpg'):
+        return image_storage.save(name, ContentFile(content))
+
+    def test_identical_uploads_share_one_counted_blob(self):
+        name = self.store()
+        self.assertEqual(self.store(), name)
+        images = [CarImage.objects.create(car=self.car, image=name) for _ in range(2)]
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 2)
+
+        images[0].delete()
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 1)
+
+    def test_other_extension_reuses_the_tracked_file(self):
+        name = self.store()
+        self.assertEqual(self.store(name='product_images/photo.PNG'), name)
+        self.assertEqual(image_storage.content_name(ContentFile(b'image bytes', name='photo.jpeg')), name)
+        self.assertEqual(ImageBlob.objects.count(), 1)
+        self.assertFalse(image_storage.exists(name.replace('.jpg', '.png')))
+
+    @override_settings(CAR_IMAGE_BLOB_GRACE_SECONDS=0)
+    def test_last_reference_collects_the_file(self):
+        name = self.store()
+        image = CarImage.objects.create(car=self.car, image=name)
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertFalse(ImageBlob.objects.filter(name=name).exists())
+        self.assertFalse(image_storage.exists(name))
+
+    def test_stored_again_blob_is_not_collected(self):
+        name = self.store()
+        ImageBlob.objects.filter(name=name).update(touched_at=timezone.now() - timedelta(days=2))
+        self.store()
+
+        self.assertEqual(ImageBlob.objects.collect([name], touched_before=timezone.now() - timedelta(hours=1)), 0)
+        self.assertTrue(image_storage.exists(name))
+
+    def test_gc_command_collects_old_unreferenced_blobs(self):
+        kept, stale = self.store(b'kept'), self.store(b'stale')
+        CarImage.objects.create(car=self.car, image=kept)
+        ImageBlob.objects.update(touched_at=timezone.now() - timedelta(days=2))
+
+        call_command('gc_image_blobs', stdout=StringIO())
+        self.assertEqual(list(ImageBlob.objects.values_list('name', flat=True)), [kept])
+        self.assertTrue(image_storage.exists(kept))
+        self.assertFalse(image_storage.exists(stale))
+
+    def test_synced_removals_release_their_blobs_in_one_batch(self):
+        names = [self.store(content) for content in (b'a', b'b', b'c')]
+        images = [CarImage.objects.create(car=self.car, image=name) for name in names]
+        with mock.patch.object(ImageBlobQuerySet, 'release', autospec=True) as release:
+            sync_car_images(self.car, [], keep=[images[0].id])
+        release.assert_called_once()
+        self.assertCountEqual(release.call_args.args[1], names[1:])
+        self.assertEqual(list(self.car.images.all()), images[:1])
+
+
+@skipUnless(connection.vendor == 'postgresql', "search_vector is maintained by a PostgreSQL trigger")
+class FullTextSearchTest(TestCase):
+    def setUp(self):
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.in_title = Car.objects.create(model=model, title='Corolla hybrid', description='Family sedan',
+                                           price=1000, amount=1)
+        self.in_description = Car.objects.create(model=model, title='Camry', description='Bigger than a corolla',
+                                                 price=1000, amount=1)
+        Car.objects.create(model=model, title='Land Cruiser', description='Off-road', price=1000, amount=1)
+
+    def search(self, query):
+        return list(search_cars(Car.objects.all(), query).order_by('-rank', '-id').values_list('id', flat=True))
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search('corolla'), [self.in_title.id, self.in_description.id])
+
+    def test_trigger_follows_title_and_description_changes(self):
+        # update() bypasses the ORM entirely, so only the trigger can refresh the vector
+        Car.objects.filter(id=self.in_title.id).update(title='Prius')
+        self.assertEqual(self.search('corolla'), [self.in_description.id])
+        self.assertEqual(self.search('prius'), [self.in_title.id])
+
+        Car.objects.filter(id=self.in_description.id).update(description='Bigger than a prius')
+        self.assertEqual(self.search('corolla'), [])
+        self.assertEqual(self.search('prius'), [self.in_title.id, self.in_description.id])
+
+
+class PrefixTrieTest(TestCase):
+    def setUp(self):
+        self.trie = PrefixTrie()
+        for title in ['Corolla Hybrid', 'Camry', 'Land Cruiser']:
+            self.trie.insert(title, 'car')
+        self.trie.insert('Toyota', 'model')
+
+    def texts(self, query):
+        return [item['text'] for item in self.trie.suggest(query, 10)]
+
+    def test_word_starts_and_typos_match(self):
+        self.assertEqual(self.texts('hyb'), ['Corolla Hybrid'])
+        self.assertEqual(self.texts('corola'), ['Corolla Hybrid'])
+        self.assertEqual(self.texts('toyta'), ['Toyota'])
+
+    def test_short_queries_need_an_exact_prefix(self):
+        self.assertEqual(self.texts('ca'), ['Camry'])
+        self.assertEqual(self.texts('cx'), [])
+
+    def test_writes_elsewhere_rebuild_the_trie(self):
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        Car.objects.create(model=model, title='Camry', description='Sedan', price=1000, amount=1)
+        self.assertEqual([item['text'] for item in get_trie().suggest('cam', 10)], ['Camry'])
+
+        # As import_cars does from its own process: a bulk write and a shared version bump, no signals
+        Car.objects.bulk_create([Car(model=model, title='Camaro', description='Coupe', price=1000, amount=1)])
+        bump_catalogue_version()
+        self.assertEqual([item['text'] for item in get_trie().suggest('cam', 10)], ['Camry', 'Camaro'])
+
+
+class TrigramAutocompleteTest(TestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if connection.vendor != 'postgresql' or cursor.fetchone() is None:
+                self.skipTest("pg_trgm is not available")
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        for i, title in enumerate(['Corolla Hybrid', 'Camry', 'Land Cruiser']):
+            Car.objects.create(model=model, title=title, description=f'Description {i}', price=1000, amount=1)
+
+    def texts(self, query):
+        return [(item['text'], item['kind']) for item in trigram_suggest(query, 10)]
+
+    def test_typos_match(self):
+        self.assertEqual(self.texts('corola'), [('Corolla Hybrid', 'car')])
+        self.assertEqual(self.texts('toyot'), [('Toyota', 'model')])
+
+    def test_similarity_threshold(self):
+        self.assertEqual(self.texts('xqzv'), [])
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL pg_trgm.word_similarity_threshold = 0.95")
+        self.assertEqual(self.texts('corola'), [])
+        self.assertEqual(self.texts('corolla'), [('Corolla Hybrid', 'car')])
+
+
+class CarBulkCreateTest(TestCase):
+    def setUp(self):
+        profile_cache.clear()
+        self.client = APIClient()
+        self.admin = UserProfile.objects.create_user(username='admin', password='secret', age=30, is_superuser=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+        self.model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+
+    def items(self, count, start=0):
+        return [{'model': self.model.id, 'title': f'Car {i}', 'description': f'Description {i}', 'price': 1000 + i,
+                 'amount': 1, 'cover_img': [f'product_images/{i}_a.jpg', f'product_images/{i}_b.jpg']}
+                for i in range(start, start + count)]
+
+    def post(self, items):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/cars/bulk/', items, format='json')
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        # The first request also loads the caller's profile into the cache
+        self.post(self.items(1))
+        response, one = self.post(self.items(1, start=1))
+        self.assertEqual(response.status_code, 201)
+        response, many = self.post(self.items(20, start=2))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(one, many)
+
+    def test_response_lists_the_new_ids_in_order(self):
+        response, _ = self.post(self.items(3))
+        self.assertEqual(response.status_code, 201)
+        cars = Car.objects.filter(id__in=response.data['ids'])
+        self.assertEqual([cars.get(id=car_id).title for car_id in response.data['ids']], ['Car 0', 'Car 1', 'Car 2'])
+        self.assertEqual(CarImage.objects.filter(car__in=cars).count(), 6)
+
+    def test_one_invalid_item_rejects_the_whole_batch(self):
+        Car.objects.create(model=self.model, title='Taken', description='Description 2', price=1, amount=1)
+        items = self.items(4)
+        items[1]['price'] = 'cheap'
+        items[3]['model'] = 0
+        response, _ = self.post(items)
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['errors']
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(errors[0], {})
+        self.assertIn('price', errors[1])
+        self.assertIn('description', errors[2])
+        self.assertIn('model', errors[3])
+        self.assertEqual(Car.objects.count(), 1)
+
+    def test_requires_a_superuser(self):
+        user = UserProfile.objects.create_user(username='seller', password='secret', age=30)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        response, _ = self.post(self.items(1))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Car.objects.exists())
+
+
+class CarExportTest(TestCase):
+    def setUp(self):
+        profile_cache.clear()
+        self.client = APIClient()
+        admin = UserProfile.objects.create_user(username='admin', password='secret', age=30, is_superuser=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        for i in range(3):
+            car = Car.objects.create(model=model, title=f'Car {i}', description=f'Description {i}', price=1000 + i,
+                                     amount=1, is_deleted=i == 2)
+            CarImage.objects.create(car=car, image=f'product_images/{i}.jpg')
+
+    def export(self, **params):
+        response = self.client.get('/cars/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson(self):
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="cars.ndjson"')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([(row['title'], row['model'], row['images']) for row in rows],
+                         [('Car 0', 'Toyota', ['/media/product_images/0.jpg']),
+                          ('Car 1', 'Toyota', ['/media/product_images/1.jpg'])])
+
+    def test_gzipped_csv(self):
+        response, content = self.export(export_format='csv', gzip='true')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="cars.csv.gz"')
+        rows = list(csv.DictReader(StringIO(gzip.decompress(content).decode())))
+        self.assertEqual([(row['title'], row['price'], row['images']) for row in rows],
+                         [('Car 0', '1000.0', '/media/product_images/0.jpg'),
+                          ('Car 1', '1001.0', '/media/product_images/1.jpg')])
+
+    def test_requires_a_superuser(self):
+        user = UserProfile.objects.create_user(username='seller', password='secret', age=30)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.assertEqual(self.client.get('/cars/export/').status_code, 403)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), CAR_IMAGE_VARIANT_SIZES=(160, 480, 1024))
+class ImageVariantTest(TestCase):
+    def setUp(self):
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'product_images'), exist_ok=True)
+        PILImage.new('RGB', (600, 400), 'red').save(os.path.join(settings.MEDIA_ROOT, 'product_images/red.jpg'))
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        car = Car.objects.create(model=model, title='Camry', description='Sedan', price=1000, amount=1)
+        self.image = CarImage.objects.create(car=car, image='product_images/red.jpg')
+        self.addCleanup(discard_executor)
+
+    def assertVariantsStored(self):
+        self.image.refresh_from_db()
+        self.assertEqual(sorted(self.image.variants), ['160', '480'])
+        for formats in self.image.variants.values():
+            for name in formats.values():
+                self.assertTrue(os.path.isfile(os.path.join(settings.MEDIA_ROOT, name)))
+
+    def test_pool_renders_variants(self):
+        self.assertEqual(build_variants([(self.image.id, self.image.image.name)]), 1)
+        self.assertVariantsStored()
+
+    def test_unavailable_pool_renders_in_process(self):
+        with mock.patch.object(ProcessPoolExecutor, 'submit', side_effect=BrokenProcessPool('worker died')):
+            schedule_variants([(self.image.id, self.image.image.name)])
+        self.assertVariantsStored()
+
+    def test_batch_bumps_the_catalogue_once(self):
+        other = CarImage.objects.create(car=self.image.car, image=self.image.image.name)
+        images = [(self.image.id, self.image.image.name), (other.id, other.image.name)]
+        with mock.patch('carapp.variants.bump_catalogue_version') as bump, \
+                mock.patch.object(ProcessPoolExecutor, 'submit', side_effect=BrokenProcessPool('worker died')):
+            schedule_variants(images)
+        bump.assert_called_once()
+        self.assertVariantsStored()
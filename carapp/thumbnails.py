@@ -0,0 +1,44 @@
+import os
+
+from PIL import Image, ImageOps
+
+# Kept free of Django imports: this module is loaded by the image worker processes.
+
+FORMATS = {
+    'jpeg': ('JPEG', '.jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+}
+
+
+def variant_name(name, size, image_format):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'variants', f'{stem}_{size}{FORMATS[image_format][1]}')
+
+
+def render_variants(root, name, sizes):
+    """
+    Write resized JPEG and WebP copies of ``root/name`` for every size that is
+    smaller than the original. Returns ``{size: {format: variant name}}``.
+    """
+    variants = {}
+    with Image.open(os.path.join(root, name)) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'L'):
+            original = original.convert('RGB')
+
+        for size in sorted(sizes):
+            if size >= max(original.size):
+                break
+            resized = original.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            variants[str(size)] = {}
+            for image_format, (pil_format, _, options) in FORMATS.items():
+                target = variant_name(name, size, image_format)
+                target_path = os.path.join(root, target)
+                # Content-addressed sources share variants, so an existing file is already correct
+                if not os.path.exists(target_path):
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    resized.save(target_path, pil_format, **options)
+                variants[str(size)][image_format] = target
+    return variants
@@ -0,0 +1,39 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from carapp.models import Car
+
+# Scores are stored relative to this instant; changing it invalidates every stored score.
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_rate():
+    return math.log(2) / (settings.CAR_TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def update_trending(now=None):
+    """
+    Fold views recorded since the last run into ``Car.trending_score``.
+
+    The score is ``ln(sum(exp(rate * (t_view - TRENDING_EPOCH))))`` over all
+    counted views, i.e. an exponentially decayed view count kept in log
+    space. Decaying every car by the same factor does not change their order,
+    so scores never have to be rewritten as time passes: only cars whose
+    ``views`` moved past ``trending_views`` are updated, in one statement,
+    with the new views dated ``now``. Returns the number of cars updated.
+    """
+    now = now or timezone.now()
+    offset = decay_rate() * (now - TRENDING_EPOCH).total_seconds()
+
+    current = F('trending_score')
+    added = Ln(F('views') - F('trending_views')) + Value(offset)
+    # log(exp(a) + exp(b)) without overflowing: max(a, b) + log(1 + exp(-|a - b|)). The exponent is
+    # clamped because PostgreSQL raises on underflow, e.g. against the 0 score of a car never scored.
+    combined = Greatest(current, added) + Ln(Value(1.0) + Exp(Greatest(-Abs(current - added), Value(-700.0))))
+    return Car.objects.filter(views__gt=F('trending_views')).update(
+        trending_score=combined, trending_views=F('views'))
@@ -1,8 +1,17 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the catalogue reads run on the async ORM instead of occupying a thread each
+CarListView = async_views.AsyncCarList if settings.CATALOGUE_ASYNC_VIEWS else views.CarList
+CarDetailView = async_views.AsyncCarDetail if settings.CATALOGUE_ASYNC_VIEWS else views.CarDetail
 
 urlpatterns = [
-    path('', views.CarList.as_view(), name='Cars'),
-    path('<int:_id>/', views.CarDetail.as_view(), name='car_detail'),
+    path('', CarListView.as_view(), name='Cars'),
+    path('bulk/', views.CarBulkCreate.as_view(), name='car_bulk_create'),
+    path('export/', views.CarExport.as_view(), name='car_export'),
+    path('autocomplete/', views.CarAutocomplete.as_view(), name='car_autocomplete'),
+    path('nearby/', views.CarNearby.as_view(), name='car_nearby'),
+    path('<int:_id>/', CarDetailView.as_view(), name='car_detail'),
     path('<int:user_id>/user/', views.CarUser.as_view(), name='car_user'),
 ]
@@ -0,0 +1,158 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from carapp.cache import bump_catalogue_version
+from carapp.models import Car, CarImage
+from carapp.thumbnails import render_variants
+
+logger = logging.getLogger('carapp.variants')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.CAR_IMAGE_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def discard_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def submit_render(name):
+    """Submit ``name`` to the worker pool; None when the pool cannot take work."""
+    try:
+        return get_executor().submit(render_variants, str(image_storage().location), name,
+                                     settings.CAR_IMAGE_VARIANT_SIZES)
+    except (OSError, RuntimeError) as e:
+        # Processes that cannot start (OSError) or a pool broken by a dead worker (BrokenProcessPool,
+        # a RuntimeError); it is dropped so the next submit starts a fresh one
+        logger.warning(f"Image worker pool unavailable, rendering {name} in process: {str(e)}")
+        discard_executor()
+        return None
+
+
+def render_here(name):
+    future = Future()
+    try:
+        future.set_result(render_variants(str(image_storage().location), name, settings.CAR_IMAGE_VARIANT_SIZES))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def image_storage():
+    return CarImage._meta.get_field('image').storage
+
+
+def source_path(name):
+    try:
+        path = image_storage().path(name)
+    except NotImplementedError:
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def schedule_variants(images):
+    """
+    Render thumbnail/WebP variants for ``(id, name)`` pairs in the worker pool.
+
+    Images whose file is not available on local storage (e.g. external URLs)
+    are skipped. Results are written back to ``CarImage.variants`` as they
+    complete; nothing here blocks the caller unless the pool is unavailable,
+    in which case the image is rendered and stored right away.
+    """
+    images = [(image_id, name) for image_id, name in images if name and source_path(name)]
+    if not images:
+        return
+    batch = VariantBatch(len(images))
+    for image_id, name in images:
+        future = submit_render(name)
+        if future is None:
+            batch.save(image_id, name, render_here(name))
+        else:
+            future.add_done_callback(partial(store_variants, batch, image_id, name))
+
+
+class VariantBatch:
+    """
+    Images of one schedule_variants() call.
+
+    Their cars are touched and the catalogue bumped once, after the last
+    image of the batch is stored, rather than once per image.
+    """
+
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self._remaining = size
+        self._stored = []
+
+    def save(self, image_id, name, future):
+        stored = False
+        try:
+            stored = save_variants(image_id, name, future)
+        finally:
+            with self._lock:
+                if stored:
+                    self._stored.append(image_id)
+                self._remaining -= 1
+                last = self._remaining == 0
+            if last:
+                publish_variants(self._stored)
+
+
+def store_variants(batch, image_id, name, future):
+    # Runs on the executor's result thread, which holds its own DB connection
+    try:
+        batch.save(image_id, name, future)
+    except Exception as e:
+        logger.error(f"Failed to store variants for image {image_id}: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def save_variants(image_id, name, future):
+    """Write the rendered variants of one image; returns whether they were stored."""
+    try:
+        variants = future.result()
+    except Exception as e:
+        logger.warning(f"Failed to render variants for image {image_id} ({name}): {str(e)}")
+        return False
+    # Skip the write if the image was replaced in the meantime
+    return bool(CarImage.objects.filter(id=image_id, image=name).update(variants=variants))
+
+
+def publish_variants(image_ids):
+    if image_ids:
+        # The variant URLs are part of the car payload: move its validators and cached pages on
+        Car.objects.filter(images__id__in=image_ids).update(updated_at=timezone.now())
+        bump_catalogue_version()
+
+
+def build_variants(images):
+    """Render variants for ``(id, name)`` pairs through the pool, wait, and store them."""
+    futures = [
+        (image_id, name, submit_render(name) or render_here(name))
+        for image_id, name in images
+        if name and source_path(name)
+    ]
+    stored = [image_id for image_id, name, future in futures if save_variants(image_id, name, future)]
+    publish_variants(stored)
+    return len(stored)
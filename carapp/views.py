@@ -1,19 +1,31 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from drf_yasg import openapi
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import AllowAny
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import prefetch_related_objects
 from .serializers import *
 from rest_framework.exceptions import PermissionDenied
 import logging
-from django.db.models import Q
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from .serializers import CarUpdateSerializer, CarSerializer
-from utils.tokens import get_user_id_from_token
+from .pagination import KeysetPagination
+from .search import search_cars
+from .autocomplete import suggest
+from .nearby import nearby_cars
+from .counters import view_counter
+from .facets import car_facets
+from .cache import car_list_cache_key, catalogue_cache, catalogue_version, params_digest
+from .bulk import create_cars, sync_car_images, validate_cars
+from .export import CONTENT_TYPES, export_cars
+from .variants import schedule_variants
+from utils.http import make_etag, not_modified_response, set_validators
+from utils.auth import get_identity
 
 logger = logging.getLogger('carapp.views')
 
@@ -22,26 +34,39 @@ class CarDetail(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [AllowAny]
 
+    def get_lookup(self, _id):
+        user = get_identity(self.request).snapshot
+        if user is None:
+            return {'id': _id}
+        return {'id': _id, 'user_id': user.id}
+
     def get_object(self, _id):
-        try:
-            user_id = get_user_id_from_token(self.request)
-            user = UserProfile.objects.get(id=user_id)
-        except UserProfile.DoesNotExist:
-            return get_object_or_404(Car, id=_id)
-        return get_object_or_404(Car, id=_id, user=user)
+        return get_object_or_404(Car, **self.get_lookup(_id))
 
-    @transaction.atomic
     def get(self, request, _id):
+        lookup = self.get_lookup(_id)
+
+        if 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers:
+            state = Car.objects.filter(**lookup).values('updated_at', 'views', 'favourites_count').first()
+            if state is not None:
+                etag = make_etag('car', _id, state['updated_at'].isoformat(), state['views'],
+                                 state['favourites_count'])
+                not_modified = not_modified_response(request, etag, state['updated_at'])
+                if not_modified is not None:
+                    view_counter.incr(_id)
+                    return not_modified
+
         try:
-            car = self.get_object(_id)
+            car = get_object_or_404(Car.objects.prefetch_related('images'), **lookup)
         except Http404:
             logger.error(f"Car with ID {_id} not found.")
             return Response({"message": f"Car Not Found"}, status=404)
 
-        serializer = CarSerializer(car)
+        etag = make_etag('car', car.id, car.updated_at.isoformat(), car.views, car.favourites_count)
+        view_counter.incr(car.id)
         car.views += 1
-        car.save()
-        return Response(serializer.data, status=200)
+        serializer = CarSerializer(car)
+        return set_validators(Response(serializer.data, status=200), etag, car.updated_at)
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -50,22 +75,23 @@ class CarDetail(APIView):
         ],
         request_body=CarUpdateSerializer,
     )
+    @transaction.atomic
     def put(self, request, _id):
         car = self.get_object(_id)
         serializer = CarUpdateSerializer(car, data=request.data, partial=True)
 
         if serializer.is_valid():
-            cover_imgs = request.data.get('cover_img')
-
-            #      
-            car.images.all().delete()
+            cover_imgs = request.FILES.getlist('cover_img') or request.data.get('cover_img') or []
+            if isinstance(cover_imgs, str):
+                cover_imgs = [cover_imgs]
+            keep = serializer.validated_data.get('images')
 
-            if cover_imgs:
-                for cover_img in cover_imgs:
-                    CarImage.objects.create(car=car, image=cover_img)
+            # Only the images that were added, removed or reordered are touched
+            if keep is not None or cover_imgs:
+                sync_car_images(car, cover_imgs, keep=keep)
 
             serializer.save()
-            return Response(serializer.data)
+            return Response(CarSerializer(car).data)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -82,8 +108,7 @@ class CarDetail(APIView):
             logger.warning(f"Failed to delete car. Car with ID {_id} not found.")
             return Response({"message": "Car Not Found"}, status=404)
 
-        user_id = get_user_id_from_token(request)
-        user = UserProfile.objects.get(id=user_id)
+        user = get_identity(request).get_snapshot()
 
         if not car.is_deleted and user.is_superuser:
             car.is_deleted = True
@@ -96,7 +121,71 @@ class CarDetail(APIView):
             return Response({"message": "Car has already been deleted or unauthorized access."}, status=404)
 
 
-class CarList(APIView):
+def page_state(cars):
+    """
+    ``(rows, last_modified)`` describing a fetched list of cars for its validators.
+
+    Together with the catalogue version, which every catalogue write bumps,
+    the rows pin down the payload; they also carry the counters flushed
+    without a bump. Only the listed cars are read, never the whole result set.
+    """
+    rows = [(car.id, car.updated_at.isoformat(), car.views, car.favourites_count) for car in cars]
+    return rows, max((car.updated_at for car in cars), default=None)
+
+
+class CarListMixin:
+    """Query building shared by the sync CarList and the async catalogue view."""
+    # Each ordering ends in the unique id and is backed by an index, except relevance
+    orderings = {
+        'views': ('-views', '-id'),
+        'trending': ('-trending_score', '-id'),
+        'favourites': ('-favourites_count', '-id'),
+        'relevance': ('-rank', '-id'),
+    }
+
+    def get_base_queryset(self, cars, params):
+        cars = cars.alive()
+        search_query = params.get('search')
+        if search_query:
+            cars = search_cars(cars, search_query)
+        return cars
+
+    def get_queryset(self, params):
+        cars = self.get_base_queryset(Car.objects.for_listing(), params)
+
+        min_price = params.get('min_price')
+        max_price = params.get('max_price')
+        if min_price is not None:
+            cars = cars.filter(price__gte=min_price)
+        if max_price is not None:
+            cars = cars.filter(price__lte=max_price)
+
+        model = params.get('model')
+        if model:
+            cars = cars.filter(model_id=model)
+        return cars
+
+    def get_facet_queryset(self, params):
+        return self.get_base_queryset(Car.objects.all(), params)
+
+    def get_paginator(self, params):
+        ordering = params.get('ordering') or ('relevance' if params.get('search') else 'views')
+        if ordering == 'relevance' and not params.get('search'):
+            ordering = 'views'
+        return KeysetPagination(ordering=self.orderings[ordering], page_size=params.get('page_size'))
+
+    def get_etag(self, version, params, rows, facets=None):
+        return make_etag('cars', version, params_digest(params), rows, facets)
+
+    def get_paginated_data(self, request, paginator, cached):
+        paginator.next_cursor = cached['next_cursor']
+        data = paginator.get_paginated_data(request, cached['results'])
+        if cached.get('facets') is not None:
+            data['facets'] = cached['facets']
+        return data
+
+
+class CarList(CarListMixin, APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [AllowAny]
 
@@ -110,58 +199,45 @@ class CarList(APIView):
     def get(self, request):
         query_serializer = CarQuerySerializer(data=request.query_params)
         query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+        paginator = self.get_paginator(params)
+
+        version = catalogue_version()
+        cache_key = car_list_cache_key(version, params)
+        cached = catalogue_cache().get(cache_key)
+        if cached is None:
+            if params.get('model') and not Model.objects.filter(id=params['model']).exists():
+                return Response({"message": "Model not found"}, status=404)
+            cars = self.get_queryset(params)
+
+            facets = None
+            if params['include_facets']:
+                facets = car_facets(self.get_facet_queryset(params), model=params.get('model'),
+                                    min_price=params.get('min_price'), max_price=params.get('max_price'))
+            page = paginator.paginate_queryset(cars.prefetch_related(None), cursor=params.get('cursor'))
+            rows, last_modified = page_state(page)
+            etag = self.get_etag(version, params, rows, facets)
+            not_modified = not_modified_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+
+            prefetch_related_objects(page, 'images')
+            serializer = CarSerializer(page, many=True, context={'image_size': params.get('image_size')})
+            cached = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'next_cursor': paginator.next_cursor,
+                'results': serializer.data,
+                'facets': facets,
+            }
+            catalogue_cache().set(cache_key, cached, settings.CAR_LIST_CACHE_TIMEOUT)
+        else:
+            not_modified = not_modified_response(request, cached['etag'], cached['last_modified'])
+            if not_modified is not None:
+                return not_modified
 
-        show_own_products = query_serializer.validated_data.get('show_own_products', False)
-        search_query = query_serializer.validated_data.get('search', None)
-        min_price = query_serializer.validated_data.get('min_price')
-        max_price = query_serializer.validated_data.get('max_price')
-        model = query_serializer.validated_data.get('model')
-
-        try:
-            user_id = get_user_id_from_token(request)
-            user = UserProfile.objects.get(id=user_id)
-
-            cars = Car.objects.filter(is_deleted=False)
-
-            if search_query:
-                cars = cars.filter(Q(title__icontains=search_query) | Q(description__icontains=search_query))
-
-            if min_price is not None:
-                cars = cars.filter(price__gte=min_price)
-            if max_price is not None:
-                cars = cars.filter(price__lte=max_price)
-            if model:
-                try:
-                    model_obj = Model.objects.get(id=model)
-                    cars = cars.filter(model=model_obj)
-                except Model.DoesNotExist:
-                    return Response({"message": "Model not found"}, status=404)
-
-            cars = cars.order_by('-views')[:30]
-            serializer = CarSerializer(cars, many=True)
-
-            return Response(serializer.data, status=200)
-
-        except UserProfile.DoesNotExist:
-            cars = Car.objects.filter(is_deleted=False)
-
-            if search_query:
-                cars = cars.filter(Q(title__icontains=search_query) | Q(description__icontains=search_query))
-
-            if min_price is not None:
-                cars = cars.filter(price__gte=min_price)
-            if max_price is not None:
-                cars = cars.filter(price__lte=max_price)
-            if model:
-                try:
-                    model_obj = Model.objects.get(id=model)
-                    cars = cars.filter(model=model_obj)
-                except Model.DoesNotExist:
-                    return Response({"message": "Model not found"}, status=404)
-
-            cars = cars.order_by('-views')[:30]
-            serializer = CarSerializer(cars, many=True)
-            return Response(serializer.data, status=200)
+        response = Response(self.get_paginated_data(request, paginator, cached), status=200)
+        return set_validators(response, cached['etag'], cached['last_modified'])
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -187,18 +263,17 @@ class CarList(APIView):
     def post(self, request):
         try:
             # Get the array of images from the request data
-            cover_imgs = request.data.get('cover_img') or []
+            cover_imgs = request.FILES.getlist('cover_img') or request.data.get('cover_img') or []
 
             # Get the user profile based on the token or however you identify the user
-            user_id = get_user_id_from_token(request)
-            user = UserProfile.objects.get(id=user_id)
+            user = get_identity(request).get_snapshot()
 
             # Check if the user is an admin or has permissions to create a car
             if not user.is_superuser:
                 raise PermissionDenied("You don't have permission to create a car.")
 
             data = {
-                'user': user,
+                'user': user.id,
                 'model': request.data.get('model'),
                 'title': request.data.get('title'),
                 'description': request.data.get('description'),
@@ -215,9 +290,11 @@ class CarList(APIView):
                 # Save the car instance
                 car = serializer.save()
 
-                # Save each image in the cover_imgs array
-                for cover_img in cover_imgs:
-                    CarImage.objects.create(car=car, image=cover_img)
+                # Save all images from the cover_imgs array in one INSERT
+                images = CarImage.objects.bulk_create([CarImage(car=car, image=cover_img, position=position)
+                                                      for position, cover_img in enumerate(cover_imgs)])
+                ImageBlob.objects.retain([image.image.name for image in images])
+                transaction.on_commit(lambda: schedule_variants([(image.id, image.image.name) for image in images]))
 
                 # Log information including user details, car ID, and image details
                 logger.info(
@@ -239,18 +316,110 @@ class CarList(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class CarBulkCreate(APIView):
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ],
+        request_body=CarBulkItemSerializer(many=True),
+        security=[],
+    )
+    def post(self, request):
+        try:
+            user = get_identity(request).get_snapshot()
+        except UserProfile.DoesNotExist:
+            logger.error("User not found")
+            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if not user.is_superuser:
+            logger.warning(f"User {user.username} is not allowed to bulk create cars.")
+            return Response({"Permission Denied": "You don't have permission to create a car."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty list of cars."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.CAR_BULK_MAX_ITEMS:
+            return Response({"error": f"At most {settings.CAR_BULK_MAX_ITEMS} cars can be created at once."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        validated, errors = validate_cars(items)
+        if any(errors):
+            logger.error(f"Bulk car creation rejected: {sum(1 for e in errors if e)} invalid items.")
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            cars = create_cars(user, validated)
+        except IntegrityError as e:
+            logger.error(f"Bulk car creation conflicted with a concurrent write: {str(e)}")
+            return Response({"error": "A car with one of these descriptions already exists."},
+                            status=status.HTTP_409_CONFLICT)
+
+        logger.info(f"Bulk created {len(cars)} cars. User: {user.username}")
+        return Response({"ids": [car.id for car in cars]}, status=status.HTTP_201_CREATED)
+
+
+class CarExport(APIView):
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ],
+        query_serializer=CarExportQuerySerializer(),
+        security=[],
+    )
+    def get(self, request):
+        query_serializer = CarExportQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        export_format = query_serializer.validated_data['export_format']
+        compress = query_serializer.validated_data['gzip']
+
+        try:
+            user = get_identity(request).get_snapshot()
+        except UserProfile.DoesNotExist:
+            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+        if not user.is_superuser:
+            logger.warning(f"User {user.username} is not allowed to export cars.")
+            return Response({"Permission Denied": "You don't have permission to export cars."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        filename = f"cars.{export_format}" + (".gz" if compress else "")
+        response = StreamingHttpResponse(
+            export_cars(export_format, compress),
+            content_type='application/gzip' if compress else CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        logger.info(f"User {user.username} started a {filename} export.")
+        return response
+
+
 class CarUser(APIView):
     def get(self, request, user_id):
         try:
             user = UserProfile.objects.get(id=user_id)
-            cars = Car.objects.filter(user=user)
-
-            if not cars.exists():
+            version = catalogue_version()
+            # Images are fetched only once the validators did not answer with a 304
+            cars = list(Car.objects.for_listing().prefetch_related(None).filter(user=user))
+            if not cars:
                 return Response({"message": f"No cars found for the user with id {user_id}"},
                                 status=status.HTTP_404_NOT_FOUND)
 
+            rows, last_modified = page_state(cars)
+            etag = make_etag('user-cars', user_id, version, rows)
+            not_modified = not_modified_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+
+            prefetch_related_objects(cars, 'images')
             serializer = CarSerializer(cars, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return set_validators(Response(serializer.data, status=status.HTTP_200_OK), etag, last_modified)
 
         except UserProfile.DoesNotExist:
             logger.error(f"User with ID {user_id} does not exist.")
@@ -258,3 +427,33 @@ class CarUser(APIView):
         except Exception as e:
             logger.error(f"An error occurred while processing the request: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CarNearby(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(query_serializer=CarNearbyQuerySerializer())
+    def get(self, request):
+        query_serializer = CarNearbyQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+
+        paginator = KeysetPagination(ordering=('distance', 'id'), page_size=params.get('page_size'))
+        page = nearby_cars(params['lat'], params['lon'], params['radius_km'], paginator, cursor=params.get('cursor'))
+        serializer = NearbyCarSerializer(page, many=True)
+        return Response(paginator.get_paginated_data(request, serializer.data), status=200)
+
+
+class CarAutocomplete(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(query_serializer=CarAutocompleteQuerySerializer())
+    def get(self, request):
+        query_serializer = CarAutocompleteQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        query = query_serializer.validated_data['q']
+        limit = query_serializer.validated_data.get('limit', settings.CAR_AUTOCOMPLETE_LIMIT)
+
+        return Response({"results": suggest(query, limit)}, status=200)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FeaturedProductConfig(AppConfig):
     name = 'featured_productapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
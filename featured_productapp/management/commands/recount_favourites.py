@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from carapp.cache import bump_catalogue_version
+from carapp.models import Car
+from featured_productapp.models import FeaturedCar
+
+
+class Command(BaseCommand):
+    help = "Rebuild Car.favourites_count from the live FeaturedCar rows, e.g. after a bulk update that skipped it."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help="Cars per UPDATE, by id range, so no statement locks the whole table")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        favourites = (FeaturedCar.objects.alive().filter(car=OuterRef('pk')).order_by()
+                      .values('car').annotate(total=Count('id')).values('total'))
+        actual = Coalesce(Subquery(favourites), 0)
+
+        last_id = Car.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        corrected = 0
+        for start in range(0, last_id, batch_size):
+            # Only rows that drifted are written
+            corrected += (Car.objects.filter(id__gt=start, id__lte=start + batch_size)
+                          .alias(actual=actual).exclude(favourites_count=F('actual'))
+                          .update(favourites_count=actual))
+
+        if corrected:
+            bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(f"Corrected the favourites count of {corrected} cars"))
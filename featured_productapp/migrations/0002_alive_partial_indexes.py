@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0010_alive_partial_indexes'),
+        ('featured_productapp', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='featuredcar',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', '-id'], name='featuredcar_alive_user_idx'),
+        ),
+    ]
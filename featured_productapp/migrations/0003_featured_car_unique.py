@@ -0,0 +1,36 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicates(apps, schema_editor):
+    # Keep one row per (user, car): the oldest live one, or the oldest if all were removed
+    FeaturedCar = apps.get_model('featured_productapp', 'FeaturedCar')
+    seen = set()
+    duplicates = []
+    rows = FeaturedCar.objects.order_by('is_deleted', 'id').values_list('id', 'user_id', 'car_id')
+    for pk, user_id, car_id in rows.iterator():
+        if (user_id, car_id) in seen:
+            duplicates.append(pk)
+        else:
+            seen.add((user_id, car_id))
+    for start in range(0, len(duplicates), 1000):
+        FeaturedCar.objects.filter(id__in=duplicates[start:start + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carapp', '0010_alive_partial_indexes'),
+        ('featured_productapp', '0002_alive_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='featuredcar',
+            constraint=models.UniqueConstraint(fields=('user', 'car'), name='featuredcar_user_car_uniq'),
+        ),
+    ]
@@ -1,10 +1,99 @@
-from django.db import models
+from collections import Counter
+
+from django.db import connection, models, transaction
 
 from carapp.models import Car
 from userapp.models import User
+from utils.managers import SoftDeleteQuerySet, alive_index
+
+
+class FeaturedCarQuerySet(SoftDeleteQuerySet):
+    """
+    Every way of adding or removing a favourite here also moves
+    Car.favourites_count in the same transaction. A plain ``update(is_deleted=...)``
+    would not; run recount_favourites after one.
+    """
+
+    def feature(self, user_id, car_ids):
+        """
+        Add ``car_ids`` to the user's featured cars in one INSERT ... ON CONFLICT statement.
+
+        Removed favourites are revived, unknown or deleted cars are skipped.
+        Returns the ids of the cars that were not featured before.
+        """
+        if not car_ids:
+            return []
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        placeholders = ', '.join(['%s'] * len(car_ids))
+        with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (car_id, user_id, is_deleted) "
+                f"SELECT id, %s, false FROM {connection.ops.quote_name(Car._meta.db_table)} "
+                f"WHERE id IN ({placeholders}) AND NOT is_deleted "
+                f"ON CONFLICT (user_id, car_id) DO UPDATE SET is_deleted = false WHERE {table}.is_deleted "
+                f"RETURNING car_id",
+                [user_id, *car_ids],
+            )
+            added = [row[0] for row in cursor.fetchall()]
+            Car.objects.adjust_favourites(dict.fromkeys(added, 1))
+        return added
+
+    def unfeature(self, user_id, car_ids):
+        """Soft-delete the user's live favourites of ``car_ids``. Returns the ids of the cars removed."""
+        if not car_ids:
+            return []
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        placeholders = ', '.join(['%s'] * len(car_ids))
+        with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET is_deleted = true "
+                f"WHERE user_id = %s AND car_id IN ({placeholders}) AND NOT is_deleted RETURNING car_id",
+                [user_id, *car_ids],
+            )
+            removed = [row[0] for row in cursor.fetchall()]
+            Car.objects.adjust_favourites(dict.fromkeys(removed, -1))
+        return removed
+
+    def soft_delete(self):
+        with transaction.atomic(savepoint=False):
+            rows = list(self.alive().select_for_update().values_list('id', 'car_id'))
+            if not rows:
+                return 0
+            updated = self.model.objects.filter(id__in=[pk for pk, _ in rows]).update(is_deleted=True)
+            removed = Counter(car_id for _, car_id in rows)
+            Car.objects.adjust_favourites({car_id: -count for car_id, count in removed.items()})
+        return updated
 
 
 class FeaturedCar(models.Model):
     car = models.ForeignKey(Car, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     is_deleted = models.BooleanField(default=False)
+
+    objects = FeaturedCarQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'car'], name='featuredcar_user_car_uniq'),
+        ]
+        indexes = [
+            alive_index('user', '-id', name='featuredcar_alive_user_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_is_deleted = instance.__dict__.get('is_deleted')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            delta = 0 if self.is_deleted else 1
+        else:
+            saved = getattr(self, '_saved_is_deleted', None)
+            delta = 0 if saved is None or saved == self.is_deleted else (-1 if self.is_deleted else 1)
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if delta:
+                Car.objects.adjust_favourites({self.car_id: delta})
+        self._saved_is_deleted = self.is_deleted
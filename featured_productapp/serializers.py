@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 
+from carapp.serializers import CarSerializer
 from featured_productapp.models import FeaturedCar
 
 
@@ -7,3 +9,31 @@ class FeaturesCarSerializer(serializers.ModelSerializer):
     class Meta:
         model = FeaturedCar
         fields = '__all__'
+
+
+class FeaturedCarExpandedSerializer(serializers.ModelSerializer):
+    car = CarSerializer(read_only=True)
+
+    class Meta:
+        model = FeaturedCar
+        fields = ['id', 'car']
+
+
+class FeaturedCarQuerySerializer(serializers.Serializer):
+    expand = serializers.ChoiceField(choices=['car'], required=False,
+                                     help_text="Embed the full car, with images, and paginate the list")
+    cursor = serializers.CharField(required=False, help_text="Opaque cursor returned in `next`")
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=settings.CAR_LIST_MAX_PAGE_SIZE)
+
+
+class FeaturedCarBatchSerializer(serializers.Serializer):
+    add = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=500,
+                                help_text="Car ids to add to the featured cars")
+    remove = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=500,
+                                   help_text="Car ids to remove from the featured cars")
+
+    def validate(self, data):
+        both = set(data['add']) & set(data['remove'])
+        if both:
+            raise serializers.ValidationError(f"Cars {sorted(both)} are both added and removed.")
+        return data
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from carapp.models import Car
+from featured_productapp.models import FeaturedCar
+
+
+# Hard deletes, including cascades from Car and UserProfile; soft deletes go through FeaturedCarQuerySet
+@receiver(post_delete, sender=FeaturedCar)
+def release_favourite(sender, instance, **kwargs):
+    if not instance.is_deleted:
+        Car.objects.adjust_favourites({instance.car_id: -1})
@@ -1,3 +1,174 @@
+import os
+
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from carapp.cache import catalogue_version
+from carapp.models import Car, CarImage
+from featured_productapp.models import FeaturedCar
+from modelapp.models import Model
+from userapp.cache import profile_cache
+from userapp.models import UserProfile
+from utils.testing import ExplainTestMixin
+
+
+class AliveIndexTest(ExplainTestMixin, TestCase):
+    def test_user_featured_cars_use_partial_index(self):
+        self.assertUsesIndex(FeaturedCar.objects.alive().filter(user_id=1).order_by('-id'),
+                             'featuredcar_alive_user_idx')
+
+
+class FeaturedCarExpandTest(TestCase):
+    def setUp(self):
+        profile_cache.clear()
+        self.user = UserProfile.objects.create_user(username='buyer', password='secret', age=30)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+
+    def add_favourites(self, count):
+        for i in range(FeaturedCar.objects.count(), FeaturedCar.objects.count() + count):
+            car = Car.objects.create(model=self.model, title=f'Car {i}', description=f'Description {i}',
+                                     price=1000 + i, amount=1)
+            CarImage.objects.create(car=car, image=f'product_images/{i}.jpg')
+            FeaturedCar.objects.create(car=car, user=self.user)
+
+    def test_expanded_list_query_count_is_constant(self):
+        self.add_favourites(1)
+        self.client.get('/featured_products', {'expand': 'car'})
+
+        self.add_favourites(9)
+        # favourites joined with their cars + one prefetch for all images; the profile is cached
+        with self.assertNumQueries(2):
+            response = self.client.get('/featured_products', {'expand': 'car'})
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['car']['title'], 'Car 9')
+        self.assertEqual(len(response.data['results'][0]['car']['images']), 1)
+
+    def test_expanded_list_is_paginated_and_skips_deleted(self):
+        self.add_favourites(3)
+        Car.objects.filter(title='Car 1').update(is_deleted=True)
+
+        first = self.client.get('/featured_products', {'expand': 'car', 'page_size': 1})
+        self.assertEqual([item['car']['title'] for item in first.data['results']], ['Car 2'])
+        second = self.client.get(first.data['next'])
+        self.assertEqual([item['car']['title'] for item in second.data['results']], ['Car 0'])
+        self.assertIsNone(second.data['next'])
+
+        # Without expand the list keeps its original shape
+        response = self.client.get('/featured_products')
+        self.assertEqual(len(response.data), 3)
+        self.assertIn('car', response.data[0])
+
+
+class FeaturedCarUpsertTest(TestCase):
+    def setUp(self):
+        profile_cache.clear()
+        self.user = UserProfile.objects.create_user(username='buyer', password='secret', age=30)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.cars = [Car.objects.create(model=model, title=f'Car {i}', description=f'Description {i}', price=1,
+                                        amount=1) for i in range(3)]
+        # Warm the profile cache
+        self.client.get('/featured_products')
+
+    def test_add_is_a_single_upsert(self):
+        car = self.cars[0]
+        # upsert + favourites_count
+        with self.assertNumQueries(2):
+            response = self.client.post('/featured_products', {'car': car.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post('/featured_products', {'car': car.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        featured = FeaturedCar.objects.get(user=self.user, car=car)
+
+        # lock the favourite + soft delete + favourites_count
+        with self.assertNumQueries(3):
+            self.client.delete(f'/featured_productsdetail/{featured.id}')
+        response = self.client.post('/featured_products', {'car': car.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(FeaturedCar.objects.filter(user=self.user, car=car, is_deleted=False).count(), 1)
+
+    def test_missing_car(self):
+        response = self.client.post('/featured_products', {'car': 0}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch(self):
+        first, second, third = self.cars
+        FeaturedCar.objects.create(user=self.user, car=first)
+        # add + favourites_count + remove (nothing to decrement), inside a transaction (a savepoint under TestCase)
+        with self.assertNumQueries(5):
+            response = self.client.post('/featured_productsbatch',
+                                        {'add': [first.id, second.id, 0], 'remove': [first.id + 1000]},
+                                        format='json')
+        self.assertEqual(response.data, {'added': [second.id], 'removed': []})
+
+        response = self.client.post('/featured_productsbatch', {'add': [third.id], 'remove': [first.id, second.id]},
+                                    format='json')
+        self.assertEqual(sorted(response.data['removed']), [first.id, second.id])
+        self.assertEqual(list(FeaturedCar.objects.alive().values_list('car_id', flat=True)), [third.id])
+
+        response = self.client.post('/featured_productsbatch', {'add': [third.id], 'remove': [third.id]},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class FavouritesCountTest(TestCase):
+    def setUp(self):
+        profile_cache.clear()
+        self.users = [UserProfile.objects.create_user(username=f'buyer{i}', password='secret', age=30)
+                      for i in range(2)]
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        self.cars = [Car.objects.create(model=model, title=f'Car {i}', description=f'Description {i}', price=1,
+                                        amount=1) for i in range(2)]
+
+    def counts(self):
+        return list(Car.objects.order_by('id').values_list('favourites_count', flat=True))
+
+    def test_every_toggle_moves_the_counter(self):
+        first, second = self.cars
+        FeaturedCar.objects.feature(self.users[0].id, [first.id, second.id])
+        FeaturedCar.objects.feature(self.users[0].id, [first.id])
+        featured = FeaturedCar.objects.create(user=self.users[1], car=first)
+        self.assertEqual(self.counts(), [2, 1])
+
+        FeaturedCar.objects.unfeature(self.users[0].id, [second.id])
+        featured.is_deleted = True
+        featured.save()
+        featured.save()
+        self.assertEqual(self.counts(), [1, 0])
+
+        featured = FeaturedCar.objects.get(id=featured.id)
+        featured.is_deleted = False
+        featured.save()
+        FeaturedCar.objects.filter(car=first).soft_delete()
+        self.assertEqual(self.counts(), [0, 0])
+
+        FeaturedCar.objects.feature(self.users[1].id, [second.id])
+        self.users[1].delete()
+        self.assertEqual(self.counts(), [0, 0])
+
+    def test_toggles_invalidate_the_car_list(self):
+        first, _ = self.cars
+        for toggle in (lambda: FeaturedCar.objects.feature(self.users[0].id, [first.id]),
+                       lambda: FeaturedCar.objects.unfeature(self.users[0].id, [first.id])):
+            version = catalogue_version()
+            with self.captureOnCommitCallbacks(execute=True):
+                toggle()
+            self.assertNotEqual(catalogue_version(), version)
+
+    def test_recount_and_ordering(self):
+        first, second = self.cars
+        FeaturedCar.objects.feature(self.users[0].id, [second.id])
+        Car.objects.filter(id=first.id).update(favourites_count=5)
+
+        call_command('recount_favourites', batch_size=1, stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.counts(), [0, 1])
 
-# Tests
+        response = APIClient().get('/cars/', {'ordering': 'favourites'})
+        self.assertEqual([(car['id'], car['favourites_count']) for car in response.data['results']],
+                         [(second.id, 1), (first.id, 0)])
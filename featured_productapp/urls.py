@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import FeaturedCarList, FeaturedProductDetail
+from .views import FeaturedCarBatch, FeaturedCarList, FeaturedProductDetail
 
 urlpatterns = [
     path('', FeaturedCarList.as_view(), name='featuredProductsList'),
+    path('batch', FeaturedCarBatch.as_view(), name='featuredProductsBatch'),
     path('detail/<int:pk>', FeaturedProductDetail.as_view(), name='featuredProductsDetail'),
 ]
@@ -1,17 +1,18 @@
+from django.db import transaction
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework import permissions
 from drf_yasg import openapi
 
 import logging
 
 from featured_productapp.models import FeaturedCar
-from featured_productapp.serializers import FeaturesCarSerializer
-from carapp.models import Car
+from featured_productapp.serializers import (FeaturedCarBatchSerializer, FeaturedCarExpandedSerializer,
+                                              FeaturedCarQuerySerializer, FeaturesCarSerializer)
+from carapp.pagination import KeysetPagination
 from drf_yasg.utils import swagger_auto_schema
-from utils.tokens import get_user_id_from_token
+from utils.auth import IdentityJWTAuthentication, get_identity
 from userapp.models import UserProfile
 
 
@@ -19,10 +20,11 @@ logger = logging.getLogger('featured_productapp.views')
 
 
 class FeaturedCarList(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [IdentityJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
+        query_serializer=FeaturedCarQuerySerializer(),
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
                               type=openapi.TYPE_STRING),
@@ -30,11 +32,24 @@ class FeaturedCarList(APIView):
         security=[],
     )
     def get(self, request):
-        user_id = get_user_id_from_token(request)
-        user = UserProfile.objects.get(id=user_id)
-        featured_products = FeaturedCar.objects.filter(user=user, is_deleted=False)
-        serializer = FeaturesCarSerializer(featured_products, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        query_serializer = FeaturedCarQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+
+        user = get_identity(request).get_snapshot()
+        featured_products = FeaturedCar.objects.alive().filter(user_id=user.id)
+        if params.get('expand') != 'car':
+            serializer = FeaturesCarSerializer(featured_products, many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        # One joined query for the page and one prefetch for all of its images, newest favourite first
+        featured_products = (featured_products.filter(car__is_deleted=False)
+                             .select_related('car').prefetch_related('car__images')
+                             .defer('car__search_vector'))
+        paginator = KeysetPagination(('-id',), page_size=params.get('page_size'))
+        page = paginator.paginate_queryset(featured_products, cursor=params.get('cursor'))
+        serializer = FeaturedCarExpandedSerializer(page, many=True)
+        return Response(paginator.get_paginated_data(request, serializer.data), status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -53,39 +68,54 @@ class FeaturedCarList(APIView):
     def post(self, request):
         try:
             car_id = request.data.get("car")
-            user_id = get_user_id_from_token(request)
-
             try:
-                user = UserProfile.objects.get(id=user_id)
+                user = get_identity(request).get_snapshot()
             except UserProfile.DoesNotExist:
                 return Response(data={"message": "User does not exist."}, status=status.HTTP_404_NOT_FOUND)
 
             try:
-                car = Car.objects.get(id=car_id)
-            except Car.DoesNotExist:
+                car_id = int(car_id)
+            except (TypeError, ValueError):
                 return Response(data={"message": "Car does not exist."}, status=status.HTTP_404_NOT_FOUND)
 
-            featured_car = FeaturedCar.objects.filter(car=car, user=user).first()
-            if featured_car:
-                if featured_car.is_deleted:
-                    featured_car.is_deleted = False
-                    featured_car.save()
-                    return Response(data={"message": "We successfully added car to features."},
-                                    status=status.HTTP_201_CREATED)
-                else:
-                    return Response(data={"message": "You have already added this car to your favorites."},
-                                    status=status.HTTP_200_OK)
-            else:
-                FeaturedCar.objects.create(car=car, user=user)
+            if FeaturedCar.objects.feature(user.id, [car_id]):
                 return Response(data={"message": "We successfully added car to features."},
                                 status=status.HTTP_201_CREATED)
+            # Nothing was inserted or revived: tell an existing favourite apart from a missing car
+            if FeaturedCar.objects.alive().filter(car_id=car_id, user_id=user.id).exists():
+                return Response(data={"message": "You have already added this car to your favorites."},
+                                status=status.HTTP_200_OK)
+            return Response(data={"message": "Car does not exist."}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.error("Internal server error when creating a Featured Car: %s", str(e))
             return Response(data={"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class FeaturedCarBatch(APIView):
+    authentication_classes = [IdentityJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=FeaturedCarBatchSerializer,
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ],
+        security=[],
+    )
+    def post(self, request):
+        serializer = FeaturedCarBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = get_identity(request).get_snapshot()
+
+        with transaction.atomic():
+            added = FeaturedCar.objects.feature(user.id, serializer.validated_data['add'])
+            removed = FeaturedCar.objects.unfeature(user.id, serializer.validated_data['remove'])
+        return Response(data={"added": added, "removed": removed}, status=status.HTTP_200_OK)
+
+
 class FeaturedProductDetail(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [IdentityJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -96,16 +126,11 @@ class FeaturedProductDetail(APIView):
         security=[],
     )
     def delete(self, request, pk):
-        user_id = get_user_id_from_token(request)
-        user = UserProfile.objects.get(id=user_id)
-        try:
-            featured_car = FeaturedCar.objects.get(id=pk, user=user, is_deleted=False)
-        except FeaturedCar.DoesNotExist:
+        user = get_identity(request).get_snapshot()
+        if not FeaturedCar.objects.alive().filter(id=pk, user_id=user.id).soft_delete():
             return Response(data={"message": "Featured Car does not exist."},
                             status=status.HTTP_404_NOT_FOUND)
 
-        featured_car.is_deleted = True
-        featured_car.save()
         return Response(data={"message": "product has been successfully removed from featured products"},
                         status=status.HTTP_200_OK)
 
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CategoryApp(AppConfig):
     name = 'modelapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
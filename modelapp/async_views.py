@@ -0,0 +1,26 @@
+from modelapp.cache import amodel_catalogue_version, local_catalogue
+from modelapp.serializers import CategoryQuerySerializer
+from modelapp.views import CategoryList, CategoryListMixin
+from utils.async_views import AsyncReadView
+from utils.http import not_modified_response, set_validators
+
+
+class AsyncCategoryList(CategoryListMixin, AsyncReadView):
+    sync_view = CategoryList
+
+    async def get(self, request):
+        query_serializer = CategoryQuerySerializer(data=request.GET)
+        if not query_serializer.is_valid():
+            return self.json(query_serializer.errors, status=400)
+        include_counts = query_serializer.validated_data['include_counts']
+
+        etag = self.get_etag(include_counts, await amodel_catalogue_version(with_counts=include_counts))
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        data = local_catalogue.lookup(etag)
+        if data is None:
+            categories = [category async for category in self.get_catalogue_queryset(include_counts)]
+            data = local_catalogue.store(etag, self.serialize_catalogue(categories, include_counts))
+        return set_validators(self.json(data), etag)
@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+
+from carapp.cache import CATALOGUE_NAMESPACE as CAR_CATALOGUE_NAMESPACE
+from utils.cache import aget_cache_versions, bump_cache_version, get_cache_versions
+
+MODEL_CATALOGUE_NAMESPACE = 'modelapp:catalogue'
+
+
+def _namespaces(with_counts):
+    # Car counts also depend on the car catalogue, so its stamp is part of the version
+    if with_counts:
+        return [MODEL_CATALOGUE_NAMESPACE, CAR_CATALOGUE_NAMESPACE]
+    return [MODEL_CATALOGUE_NAMESPACE]
+
+
+def model_catalogue_version(with_counts=False):
+    """Version stamp of the model catalogue, shared by all processes."""
+    return '.'.join(str(version) for version in get_cache_versions(_namespaces(with_counts)))
+
+
+async def amodel_catalogue_version(with_counts=False):
+    return '.'.join(str(version) for version in await aget_cache_versions(_namespaces(with_counts)))
+
+
+def bump_model_catalogue_version():
+    return bump_cache_version(MODEL_CATALOGUE_NAMESPACE)
+
+
+class LocalCatalogue:
+    """
+    Serialized catalogue kept in process memory, keyed by version.
+
+    Only the version stamp is read from the shared cache per request; the
+    payload is built once per process and version.
+    """
+    max_entries = 4
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, build):
+        data = self.lookup(key)
+        if data is None:
+            data = self.store(key, build())
+        return data
+
+    def lookup(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            return None
+
+    def store(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_catalogue = LocalCatalogue()
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:28
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+import utils.migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modelapp', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        utils.migrations.AddPostgresIndex(
+            model_name='model',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['model_name'], name='model_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
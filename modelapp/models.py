@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 
@@ -5,5 +6,10 @@ class Model(models.Model):
     model_name = models.CharField(max_length=100)
     description = models.TextField()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['model_name'], opclasses=['gin_trgm_ops'], name='model_name_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.model_name
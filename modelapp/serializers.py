@@ -6,3 +6,11 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Model
         fields = '__all__'
+
+
+class CategoryCountSerializer(CategorySerializer):
+    active_cars = serializers.IntegerField(read_only=True)
+
+
+class CategoryQuerySerializer(serializers.Serializer):
+    include_counts = serializers.BooleanField(default=False, help_text="Add the number of active cars per model")
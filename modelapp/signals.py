@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from modelapp.cache import bump_model_catalogue_version
+from modelapp.models import Model
+
+
+# Car changes reach the catalogue through the car catalogue version, see model_catalogue_version()
+@receiver([post_save, post_delete], sender=Model)
+def invalidate_model_catalogue(sender, **kwargs):
+    transaction.on_commit(bump_model_catalogue_version)
@@ -1,3 +1,55 @@
+from django.core.cache.backends.db import DatabaseCache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Tests
+from carapp.models import Car
+from modelapp.cache import (MODEL_CATALOGUE_NAMESPACE, bump_model_catalogue_version, local_catalogue,
+                            model_catalogue_version)
+from modelapp.models import Model
+
+
+class CategoryListCacheTest(TestCase):
+    def setUp(self):
+        local_catalogue.clear()
+        self.client = APIClient()
+        self.model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        Car.objects.create(model=self.model, title='Camry', description='Sedan', price=1, amount=1)
+        Car.objects.create(model=self.model, title='Corolla', description='Compact', price=1, amount=1,
+                           is_deleted=True)
+        model_catalogue_version(with_counts=True)
+
+    def test_catalogue_is_served_from_memory_with_etag(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/models/', {'include_counts': 'true'})
+        self.assertEqual(response.data[0]['active_cars'], 1)
+        # Only the shared version stamp is read from the database
+        with self.assertNumQueries(1):
+            cached = self.client.get('/models/', {'include_counts': 'true'})
+        self.assertEqual(cached.data, response.data)
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get('/models/', {'include_counts': 'true'},
+                                           HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_model_and_car_changes_invalidate(self):
+        response = self.client.get('/models/', {'include_counts': 'true'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Car.objects.create(model=self.model, title='Yaris', description='Small', price=1, amount=1)
+        counted = self.client.get('/models/', {'include_counts': 'true'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(counted.data[0]['active_cars'], 2)
+
+        plain = self.client.get('/models/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Model.objects.create(model_name='Honda', description='Also Japanese')
+        renamed = self.client.get('/models/', HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(len(renamed.data), 2)
+
+    def test_bump_is_seen_by_other_processes(self):
+        response = self.client.get('/models/')
+        bump_model_catalogue_version()
+        # What another worker or a management command reads: the same table, not this process's memory
+        other = DatabaseCache('cache_versions', {})
+        self.assertEqual(str(other.get(f'{MODEL_CATALOGUE_NAMESPACE}:version')), model_catalogue_version())
+        self.assertNotEqual(self.client.get('/models/')['ETag'], response['ETag'])
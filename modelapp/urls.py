@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+CategoryListView = async_views.AsyncCategoryList if settings.CATALOGUE_ASYNC_VIEWS else views.CategoryList
+
 urlpatterns = [
-    path('', views.CategoryList.as_view(), name='model-list'),
-    path('<int:pk>/', views.CategoryDetails.as_view(), name='model-detail'),
+    path('', CategoryListView.as_view(), name='model-list'),
+    path('<int:_id>/', views.CategoryDetails.as_view(), name='model-detail'),
 ]
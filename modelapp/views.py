@@ -7,16 +7,49 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from carapp.serializers import CategorySerializer
+from django.db.models import Count, Q
+from utils.http import make_etag, not_modified_response, set_validators
+from .cache import local_catalogue, model_catalogue_version
 
 
 logger = logging.getLogger('modelapp.views')
 
 
-class CategoryList(APIView):
+class CategoryListMixin:
+    """Catalogue building shared by the sync CategoryList and its async counterpart."""
+
+    def get_catalogue_queryset(self, include_counts):
+        categories = Model.objects.order_by('id')
+        if include_counts:
+            categories = categories.annotate(
+                active_cars=Count('categories', filter=Q(categories__is_deleted=False)))
+        return categories
+
+    def serialize_catalogue(self, categories, include_counts):
+        serializer_class = CategoryCountSerializer if include_counts else CategorySerializer
+        return serializer_class(categories, many=True).data
+
+    def get_etag(self, include_counts, version):
+        return make_etag('models', include_counts, version)
+
+
+class CategoryList(CategoryListMixin, APIView):
+    def build_catalogue(self, include_counts):
+        return self.serialize_catalogue(self.get_catalogue_queryset(include_counts), include_counts)
+
+    @swagger_auto_schema(query_serializer=CategoryQuerySerializer())
     def get(self, request):
-        category = Model.objects.all()
-        serializer = CategorySerializer(category, many=True)
-        return Response(serializer.data, status=200)
+        query_serializer = CategoryQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        include_counts = query_serializer.validated_data['include_counts']
+
+        etag = self.get_etag(include_counts, model_catalogue_version(with_counts=include_counts))
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        data = local_catalogue.get(etag, lambda: self.build_catalogue(include_counts))
+        return set_validators(Response(data, status=200), etag)
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
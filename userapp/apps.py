@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class UserApp(AppConfig):
     name = 'userapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from userapp.models import UserProfile
+
+SNAPSHOT_FIELDS = ('id', 'username', 'is_superuser', 'is_admin', 'is_active')
+
+
+class ProfileSnapshot(namedtuple('ProfileSnapshot', SNAPSHOT_FIELDS)):
+    """Read-only copy of the UserProfile fields views need; also serves as ``request.user``."""
+    __slots__ = ()
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return self.username
+
+
+class ProfileCache:
+    """
+    Process-local LRU of ProfileSnapshots with a TTL.
+
+    Holds at most USER_PROFILE_CACHE_SIZE snapshots, each for at most
+    USER_PROFILE_CACHE_TTL seconds. Signals drop an entry when its User or
+    UserProfile changes in this process; the TTL bounds staleness for
+    changes made by other processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, user_id):
+        snapshot, generation = self._lookup(user_id)
+        if generation is None:
+            return snapshot
+        return self._store(user_id, self.load(user_id), generation)
+
+    async def aget(self, user_id):
+        snapshot, generation = self._lookup(user_id)
+        if generation is None:
+            return snapshot
+        return self._store(user_id, await self.aload(user_id), generation)
+
+    def _lookup(self, user_id):
+        # Returns (snapshot, None) on a hit and (None, generation) on a miss
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1], None
+            self.misses += 1
+            return None, self._generation
+
+    def _store(self, user_id, snapshot, generation):
+        if snapshot is None:
+            return None
+        with self._lock:
+            # An invalidation ran while loading: the row may be older than it
+            if generation == self._generation:
+                self._entries[user_id] = (time.monotonic() + settings.USER_PROFILE_CACHE_TTL, snapshot)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > settings.USER_PROFILE_CACHE_SIZE:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return snapshot
+
+    def snapshot_queryset(self, user_id):
+        return UserProfile.objects.filter(id=user_id).values_list(*SNAPSHOT_FIELDS)
+
+    def load(self, user_id):
+        row = self.snapshot_queryset(user_id).first()
+        return ProfileSnapshot(*row) if row is not None else None
+
+    async def aload(self, user_id):
+        row = await self.snapshot_queryset(user_id).afirst()
+        return ProfileSnapshot(*row) if row is not None else None
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': settings.USER_PROFILE_CACHE_SIZE,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+profile_cache = ProfileCache()
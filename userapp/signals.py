@@ -0,0 +1,16 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from userapp.cache import profile_cache
+from userapp.models import UserProfile
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_profile_snapshot(sender, instance, **kwargs):
+    user_id = instance.pk
+    profile_cache.invalidate(user_id)
+    # Drop anything a concurrent request cached from the pre-commit row
+    transaction.on_commit(lambda: profile_cache.invalidate(user_id))
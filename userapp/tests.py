@@ -1,3 +1,40 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Tests
+from userapp.cache import profile_cache
+from userapp.models import UserProfile
+
+
+class ProfileCacheTest(TestCase):
+    def setUp(self):
+        profile_cache.clear()
+        profile_cache.reset_stats()
+        self.user = UserProfile.objects.create_user(username='admin', password='secret', age=30, is_superuser=True)
+
+    def test_snapshot_is_cached_until_the_profile_changes(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(profile_cache.get(self.user.id).username, 'admin')
+        with self.assertNumQueries(0):
+            profile_cache.get(self.user.id)
+
+        self.user.username = 'root'
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(profile_cache.get(self.user.id).username, 'root')
+
+    @override_settings(USER_PROFILE_CACHE_SIZE=1)
+    def test_least_recently_used_snapshot_is_evicted(self):
+        other = UserProfile.objects.create_user(username='seller', password='secret', age=30)
+        profile_cache.get(self.user.id)
+        profile_cache.get(other.id)
+        stats = profile_cache.stats()
+        self.assertEqual((stats['size'], stats['evictions'], stats['misses']), (1, 1, 2))
+
+    def test_stats_endpoint(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        client.get('/auth/user/profile-cache/')
+        response = client.get('/auth/user/profile-cache/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['hits'], response.data['misses']), (1, 1))
@@ -1,8 +1,6 @@
-from utils.tokens import get_user_id_from_token
-from django.shortcuts import get_object_or_404
+from utils.auth import IdentityJWTAuthentication, get_identity
 from rest_framework import permissions
 from drf_yasg import openapi
-from rest_framework_simplejwt.authentication import JWTAuthentication
 import logging
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -10,6 +8,7 @@ from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from .serializers import *
 from rest_framework_simplejwt.tokens import RefreshToken
+from .cache import profile_cache
 
 logger = logging.getLogger('userapp.views')
 
@@ -47,12 +46,9 @@ class UserProfileList(APIView):
 
 
 class UserProfileDetails(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [IdentityJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_user(self, _id):
-        return get_object_or_404(UserProfile, id=_id)
-
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
@@ -61,9 +57,10 @@ class UserProfileDetails(APIView):
         security=[],
     )
     def get(self, request):
-        user_id = get_user_id_from_token(request)
+        identity = get_identity(request)
+        user_id = identity.user_id
         try:
-            user = self.get_user(user_id)
+            user = identity.get_profile()
             logger.info(f"User with ID {user_id} retrieved successfully.")
         except UserProfile.DoesNotExist:
             logger.warning(f"Failed to retrieve user. User with ID {user_id} not found.")
@@ -87,9 +84,10 @@ class UserProfileDetails(APIView):
         security=[],
     )
     def put(self, request):
-        user_id = get_user_id_from_token(request)
+        identity = get_identity(request)
+        user_id = identity.user_id
         try:
-            user = self.get_user(user_id)
+            user = identity.get_profile()
             logger.info(f"Attempting to update user with ID {user_id}.")
         except UserProfile.DoesNotExist:
             logger.warning(f"Failed to update user. User with ID {user_id} not found.")
@@ -104,3 +102,22 @@ class UserProfileDetails(APIView):
             return Response(serializer.data, status=200)
         logger.error(f"Failed to update user with ID {user_id}: {serializer.errors}")
         return Response(serializer.errors, status=401)
+
+
+class ProfileCacheStats(APIView):
+    authentication_classes = [IdentityJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ],
+        security=[],
+    )
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({"message": "Only superusers can read cache statistics."},
+                            status=status.HTTP_403_FORBIDDEN)
+        # Counters are per process: each worker reports its own cache
+        return Response(profile_cache.stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,104 @@
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import AUTH_HEADER_TYPE_BYTES, JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from userapp.cache import profile_cache
+from userapp.models import UserProfile
+
+
+class RequestIdentity:
+    """
+    The caller of one request, resolved lazily and at most once.
+
+    ``token`` decodes the bearer token on first access. ``snapshot`` reads
+    the caller from the process-wide profile cache and is what
+    authentication and permission checks use; ``profile`` loads the full
+    UserProfile row for views that need the model itself. Each is reused by
+    the authentication class and by every view that asks for the user.
+    """
+
+    def __init__(self, raw_token):
+        self.raw_token = raw_token
+        self.token_error = None
+
+    @cached_property
+    def token(self):
+        if self.raw_token is None:
+            return None
+        try:
+            return JWTAuthentication().get_validated_token(self.raw_token)
+        except InvalidToken as e:
+            self.token_error = e
+            return None
+
+    @property
+    def user_id(self):
+        if self.token is None:
+            return None
+        return self.token.get(api_settings.USER_ID_CLAIM)
+
+    @cached_property
+    def snapshot(self):
+        if self.user_id is None:
+            return None
+        return profile_cache.get(self.user_id)
+
+    async def asnapshot(self):
+        if 'snapshot' not in self.__dict__:
+            # Fills the cached_property above
+            self.__dict__['snapshot'] = await profile_cache.aget(self.user_id) if self.user_id is not None else None
+        return self.snapshot
+
+    def get_snapshot(self):
+        if self.snapshot is None:
+            raise UserProfile.DoesNotExist(f"No profile for user {self.user_id}.")
+        return self.snapshot
+
+    @cached_property
+    def profile(self):
+        if self.user_id is None:
+            return None
+        return UserProfile.objects.filter(id=self.user_id).first()
+
+    def get_profile(self):
+        """Like ``UserProfile.objects.get(id=user_id)``, without a second query."""
+        if self.profile is None:
+            raise UserProfile.DoesNotExist(f"No profile for user {self.user_id}.")
+        return self.profile
+
+
+def get_identity(request):
+    """Return the RequestIdentity of ``request`` (a DRF Request or a Django HttpRequest)."""
+    request = getattr(request, '_request', request)
+    identity = getattr(request, 'identity', None)
+    if identity is None:
+        header = JWTAuthentication().get_header(request) or b''
+        parts = header.split()
+        raw_token = parts[1] if len(parts) == 2 and parts[0] in AUTH_HEADER_TYPE_BYTES else None
+        identity = request.identity = RequestIdentity(raw_token)
+    return identity
+
+
+class IdentityJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that authenticates from the request's shared RequestIdentity."""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        if self.get_raw_token(header) is None:
+            return None
+
+        identity = get_identity(request)
+        if identity.token is None:
+            raise identity.token_error
+
+        snapshot = identity.snapshot
+        if snapshot is None:
+            # Accounts without a profile, e.g. made with createsuperuser
+            return self.get_user(identity.token), identity.token
+        if not snapshot.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return snapshot, identity.token
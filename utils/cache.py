@@ -0,0 +1,71 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def _version_cache(alias):
+    return caches[alias or settings.CACHE_VERSION_ALIAS]
+
+
+def get_cache_version(namespace, alias=None):
+    """
+    Current version stamp of ``namespace``.
+
+    Entries are stored under keys that include this stamp, so bumping it
+    invalidates everything at once. A missing stamp (first use, eviction) is
+    seeded from the clock so it can never collide with an older version.
+    """
+    cache = _version_cache(alias)
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_cache_version(namespace, alias=None):
+    cache = _version_cache(alias)
+    key = _version_key(namespace)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def get_cache_versions(namespaces, alias=None):
+    """Version stamps of several namespaces, read in one round trip."""
+    cache = _version_cache(alias)
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_cache_versions(namespaces, alias=None):
+    cache = _version_cache(alias)
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def bump_cache_version(namespace, alias=None):
+    # A fresh unique stamp rather than incr(): not every backend increments atomically,
+    # and two bumps landing on the same value would let a stale entry survive the second one.
+    version = uuid.uuid4().hex
+    _version_cache(alias).set(_version_key(namespace), version, timeout=None)
+    return version
@@ -0,0 +1,114 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+MAX_PRECISION = 12
+# Length of the geohashes stored on rows; cover() never returns a longer prefix
+STORED_PRECISION = 9
+
+
+def encode(latitude, longitude, precision=STORED_PRECISION):
+    """Geohash of a point: interleaved longitude/latitude bisections, five bits per base32 character."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        target, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if target >= middle:
+            value = value * 2 + 1
+            bounds[0] = middle
+        else:
+            value *= 2
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell of ``precision`` characters."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_boxes(latitude, longitude, radius_km):
+    """
+    Boxes ``(min_lat, min_lon, max_lat, max_lon)`` that contain every point within ``radius_km``.
+
+    A box crossing the antimeridian is split in two; one reaching a pole
+    spans all longitudes.
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - delta_lat, latitude + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return [(max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0)]
+
+    # Widest longitude offset of the circle, reached north of the centre in the north and vice versa
+    delta_lon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) /
+                                            math.cos(math.radians(latitude)))))
+    min_lon, max_lon = longitude - delta_lon, longitude + delta_lon
+    if min_lon < -180:
+        return [(min_lat, min_lon + 360, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon - 360)]
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+def prefix_range(prefix):
+    """
+    ``(low, high)`` such that a geohash starts with ``prefix`` exactly when ``low <= geohash < high``.
+
+    ``high`` is None when no upper bound is needed ("zz..."). Range
+    comparisons, unlike LIKE, are answered from a plain b-tree index on
+    every backend; geohash characters sort the same in the usual collations.
+    """
+    chars = prefix.rstrip(BASE32[-1])
+    if not chars:
+        return prefix, None
+    return prefix, chars[:-1] + BASE32[BASE32.index(chars[-1]) + 1]
+
+
+def _steps(low, high, step):
+    value = low
+    while value < high:
+        yield value
+        value += step
+    yield high
+
+
+def cover(boxes, max_cells=32):
+    """
+    Geohash prefixes whose cells together contain ``boxes``.
+
+    Uses the longest prefix, up to the stored precision, that needs at most
+    ``max_cells`` cells, so an index range scan per prefix reads little
+    beyond the boxes themselves.
+    """
+    for precision in range(STORED_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        estimate = sum((math.ceil((max_lat - min_lat) / height) + 1) * (math.ceil((max_lon - min_lon) / width) + 1)
+                       for min_lat, min_lon, max_lat, max_lon in boxes)
+        if estimate <= max_cells:
+            break
+
+    # Samples at most one cell apart, edges included, land in every cell the box touches
+    return sorted({
+        encode(lat, lon, precision)
+        for min_lat, min_lon, max_lat, max_lon in boxes
+        for lat in _steps(min_lat, max_lat, height)
+        for lon in _steps(min_lon, max_lon, width)
+    })
@@ -0,0 +1,28 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """
+    Return a 304 response when the request's If-None-Match / If-Modified-Since
+    validators still match, otherwise None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,27 @@
+from django.db import models
+from django.db.models import Q
+
+ALIVE = Q(is_deleted=False)
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet for models that are hidden with an ``is_deleted`` flag instead of being deleted.
+
+    ``alive()`` is spelled exactly like the ``condition`` of the partial
+    indexes declared with ``alive_index()``, so the planner can match them.
+    """
+
+    def alive(self):
+        return self.filter(ALIVE)
+
+    def deleted(self):
+        return self.filter(is_deleted=True)
+
+    def soft_delete(self):
+        return self.update(is_deleted=True)
+
+
+def alive_index(*fields, name):
+    """Partial index over the rows that are not soft-deleted."""
+    return models.Index(fields=list(fields), name=name, condition=ALIVE)
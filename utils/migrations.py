@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """
+    AddIndex that only touches the database on PostgreSQL.
+
+    Used for GIN/trigram indexes so the project still migrates on the SQLite
+    database used for local development and tests.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class RunPostgresSQL(migrations.RunSQL):
+    """RunSQL that is skipped on every backend except PostgreSQL."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
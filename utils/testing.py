@@ -0,0 +1,14 @@
+from django.db import connections
+
+
+class ExplainTestMixin:
+    """Assertions on the query plan of a queryset (SQLite and PostgreSQL)."""
+
+    def assertUsesIndex(self, queryset, index_name):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            # Test tables are tiny; make the planner show which index it would pick for a large one
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"{index_name} not used by:\n{plan}")
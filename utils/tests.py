@@ -1,3 +1,41 @@
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from addressapp.models import Address
+from carapp.models import Car
+from modelapp.models import Model
+from userapp.models import UserProfile
+
+
+class RequestIdentityTest(TestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(username='admin', password='secret', age=30, is_superuser=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_token_and_profile_are_resolved_once(self):
+        Address.objects.create(address_name='Home', user=self.user)
+        decode = mock.patch.object(JWTAuthentication, 'get_validated_token',
+                                   autospec=True, side_effect=JWTAuthentication.get_validated_token)
+        with decode as get_validated_token, self.assertNumQueries(2):
+            # profile + addresses
+            response = self.client.get('/address/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_validated_token.call_count, 1)
+
+    def test_view_without_jwt_authentication_reuses_profile(self):
+        model = Model.objects.create(model_name='Toyota', description='Japanese cars')
+        car = Car.objects.create(user=self.user, model=model, title='Camry', description='Sedan', price=1,
+                                 amount=1)
+        # profile + car + soft delete; the profile is shared by the lookup and the permission check
+        with self.assertNumQueries(3):
+            response = self.client.delete(f'/cars/{car.id}/')
+        self.assertEqual(response.status_code, 200)
 
-# Tests
+    def test_invalid_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(self.client.get('/address/').status_code, 401)
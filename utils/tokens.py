@@ -1,15 +1,5 @@
-from rest_framework_simplejwt.exceptions import AuthenticationFailed
-from rest_framework_simplejwt.tokens import AccessToken
+from utils.auth import get_identity
 
 
 def get_user_id_from_token(request):
-    try:
-        authorization_header = request.headers.get('Authorization')
-        if authorization_header:
-            access_token = AccessToken(authorization_header.split()[1])
-            user_id = access_token['user_id']
-            return user_id
-        else:
-            return None
-    except (AuthenticationFailed, IndexError):
-        return None
+    return get_identity(request).user_id